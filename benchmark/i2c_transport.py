@@ -0,0 +1,58 @@
+"""Compares the legacy byte-wise SensorHub sweep with the block read transport.
+
+Run from the repository root:
+
+    python -m benchmark.i2c_transport --latency 0.0005 --samples 200
+"""
+import time
+import argparse
+from package.sensor.environment.dockerpi.i2c import I2CTransport
+from package.sensor.environment.dockerpi.mock import MockSMBus
+from package.sensor.environment.dockerpi.sensorhub import DockerPiSensorHub
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--latency", type=float, default=0.0005)
+parser.add_argument("--samples", type=int, default=200)
+
+
+def bytewise_sweep(bus):
+    data_buffer = [0x00]
+    for i in range(DockerPiSensorHub.TEMP_REG, DockerPiSensorHub.HUMAN_DETECT + 1):
+        data_buffer.append(bus.read_byte_data(DockerPiSensorHub.DEVICE_ADDR, i))
+
+    return data_buffer
+
+
+def block_sweep(transport, hub):
+    return transport.read_registers(
+        DockerPiSensorHub.TEMP_REG,
+        DockerPiSensorHub.HUMAN_DETECT,
+        validate=hub._is_valid_register,
+    )
+
+
+def report(name, bus, elapsed, samples):
+    print(
+        "{: <10} {: >8.3f} ms/sample {: >6.1f} transactions/sample".format(
+            name, elapsed / samples * 1000, bus.transactions / samples
+        )
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    bus = MockSMBus(transaction_latency=args.latency)
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        bytewise_sweep(bus)
+    report("byte-wise", bus, time.perf_counter() - start, args.samples)
+
+    hub = DockerPiSensorHub(bus=MockSMBus())
+    bus = MockSMBus(transaction_latency=args.latency)
+    transport = I2CTransport(DockerPiSensorHub.DEVICE_BUS, hub.DEVICE_ADDR, bus=bus)
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        block_sweep(transport, hub)
+    report("block", bus, time.perf_counter() - start, args.samples)
+    print("transport stats: {}".format(transport.stats))
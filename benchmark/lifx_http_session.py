@@ -0,0 +1,42 @@
+"""Compares one-off requests against the pooled LifxHTTPSession using a local stub API.
+
+Run from the repository root:
+
+    python -m benchmark.lifx_http_session --calls 200
+"""
+import time
+import argparse
+import requests
+from package.light.device_group.lifx.stub_server import LifxStubServer
+from package.light.device_group.lifx.http_session import LifxHTTPSession
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--calls", type=int, default=200)
+
+
+def report(name, stub, elapsed, calls):
+    print(
+        "{: <10} {: >8.3f} ms/call {: >5} requests {: >5} connections".format(
+            name, elapsed / calls * 1000, stub.requests, stub.connections
+        )
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    stub = LifxStubServer().start()
+    path = "/lights/group:Plant Lights"
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        requests.get(stub.base_url + path, timeout=5).json()
+    report("one-off", stub, time.perf_counter() - start, args.calls)
+
+    stub.reset_counters()
+    session = LifxHTTPSession.get_session(base_url=stub.base_url)
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        session.get(path).json()
+    report("pooled", stub, time.perf_counter() - start, args.calls)
+
+    stub.stop()
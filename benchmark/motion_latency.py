@@ -0,0 +1,98 @@
+"""Measures the motion to light command latency of MotionLightsManager.
+
+Drives a simulated motion sensor against a LifxHTTPGroup pointed at a local stub
+API, once with edge events and once polled every --poll-interval seconds, 1 by
+default. Pass --poll-interval 5 to match piplant's scheduled motion check.
+
+Run from the repository root:
+
+    python -m benchmark.motion_latency --triggers 20
+"""
+import time
+import argparse
+import threading
+from core.motion_lights_manager.motion_events import SimulatedMotionSensor
+from core.motion_lights_manager.motion_lights_manager import MotionLightsManager
+from package.light.device_group.lifx.stub_server import LifxStubServer
+from package.light.device_group.lifx.http_group import LifxHTTPGroup
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--triggers", type=int, default=20)
+parser.add_argument("--poll-interval", type=float, default=1)
+
+ON = {"hue": 0, "saturation": 0, "brightness": "35%", "kelvin": 3500}
+OFF = {"hue": 0, "saturation": 0, "brightness": "0%", "kelvin": 3500}
+
+
+def measure(stub, group, supports_events, triggers, poll_interval):
+    sensor = SimulatedMotionSensor(supports_events=supports_events)
+    manager = MotionLightsManager(
+        [group],
+        [sensor],
+        {"hsbk": ON},
+        {"hsbk": OFF},
+        timeout_seconds=0,
+        debounce_seconds=0,
+    )
+
+    stopped = threading.Event()
+
+    def poll():
+        while not stopped.wait(poll_interval):
+            manager.run()
+
+    poller = threading.Thread(target=poll, daemon=True)
+    if not supports_events:
+        poller.start()
+
+    # a polled trigger is seen by the next tick at the latest
+    timeout = poll_interval * 2 + 5
+    latencies = []
+    for _ in range(triggers):
+        sensor.clear()
+        manager.run()
+        manager.wait_for_lights()
+
+        # let a polling tick land anywhere in the interval, as real motion would
+        if not supports_events:
+            time.sleep(poll_interval * (len(latencies) % 4) / 4)
+
+        requests_before = stub.requests
+        start = time.perf_counter()
+        sensor.trigger()
+        while stub.requests == requests_before:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(
+                    "No light command within {} seconds of motion".format(timeout)
+                )
+            time.sleep(0.001)
+        latencies.append(time.perf_counter() - start)
+
+    stopped.set()
+
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    print(
+        "{: <8} median {: >8.1f} ms  max {: >8.1f} ms".format(
+            name,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[-1] * 1000,
+        )
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    stub = LifxStubServer().start()
+    group = LifxHTTPGroup("Motion Lights", "token", base_url=stub.base_url)
+
+    report("events", measure(stub, group, True, args.triggers, args.poll_interval))
+    report(
+        "polled",
+        measure(stub, group, False, max(4, args.triggers // 5), args.poll_interval),
+    )
+
+    stub.stop()
@@ -0,0 +1,97 @@
+"""Compares DatabaseManager.get_series with the list of dicts from SQLiteDriver.select.
+
+Fills a database with --days of one minute readings for --sensors sensors, then
+reads them all back both ways. The dict path also groups rows per sensor and type,
+which is what a chart would have to do with them.
+
+Run from the repository root:
+
+    python -m benchmark.sensor_series --path /home/pi/bench.db --days 28
+"""
+import os
+import time
+import argparse
+import tracemalloc
+from core.database_manager.database_manager import DatabaseManager
+from package.database.driver.sqlite3.driver import SQLiteDriver
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--path", default="sensor_series_bench.db")
+parser.add_argument("--days", type=int, default=28)
+parser.add_argument("--sensors", type=int, default=4)
+
+
+def fill(manager, days, sensors):
+    nowtime = int(time.time())
+    batch = []
+    for t in range(nowtime - days * 24 * 60 * 60, nowtime, 60):
+        for i in range(sensors):
+            batch.append(
+                {
+                    "id": "sensor-{}".format(i),
+                    "name": "Sensor {}".format(i),
+                    "type": "temperature",
+                    "value": 20.5 + i,
+                    "time": t,
+                }
+            )
+
+        if len(batch) >= 10000:
+            manager.insert_sensors(batch)
+            batch = []
+
+    manager.insert_sensors(batch)
+
+
+def read_dicts(manager):
+    rows = manager.driver.select(
+        DatabaseManager.TABLE_NAME_SENSORS,
+        ["name", "type", "value", "time"],
+        order_by=["name", "time"],
+    )
+
+    series = dict()
+    for row in rows:
+        series.setdefault((row["name"], row["type"]), []).append(row)
+
+    return series
+
+
+def read_series(manager):
+    return manager.get_series()
+
+
+def measure(name, read, manager):
+    tracemalloc.start()
+    start = time.perf_counter()
+    series = read(manager)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    readings = sum(len(s) for s in series.values())
+    print(
+        "{: <8} {: >8.1f} ms {: >10.0f} readings/s  peak {: >8.1f} MiB".format(
+            name, elapsed * 1000, readings / elapsed, peak / 1024 / 1024
+        )
+    )
+
+
+def remove(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    remove(args.path)
+    manager = DatabaseManager(SQLiteDriver(args.path))
+    fill(manager, args.days, args.sensors)
+
+    measure("dicts", read_dicts, manager)
+    measure("series", read_series, manager)
+
+    manager.driver.close()
+    remove(args.path)
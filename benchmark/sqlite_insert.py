@@ -0,0 +1,98 @@
+"""Compares the legacy literal INSERT with SQLiteDriver's parameterised executemany.
+
+Each batch mimics one sensor manager run. Point --path at the SD card to measure
+on the Pi; the database file is created and removed there.
+
+Run from the repository root:
+
+    python -m benchmark.sqlite_insert --path /home/pi/bench.db --batches 500
+"""
+import os
+import time
+import uuid
+import sqlite3
+import argparse
+from package.database.driver.sqlite3.driver import SQLiteDriver
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--path", default="sqlite_insert_bench.db")
+parser.add_argument("--batches", type=int, default=500)
+parser.add_argument("--rows", type=int, default=12)
+
+COLS = [
+    ("sensor_id", "TEXT", "NOT NULL"),
+    ("name", "TEXT", "NOT NULL"),
+    ("type", "TEXT", "NOT NULL"),
+    ("value", "REAL", "NOT NULL"),
+    ("time", "INTEGER", "NOT NULL"),
+]
+
+
+def make_batches(batches, rows):
+    sensor_ids = [str(uuid.uuid4()) for _ in range(rows)]
+
+    return [
+        [
+            [sensor_ids[i], "Sensor {}".format(i), "temperature", 20.5 + i, 1000 + b]
+            for i in range(rows)
+        ]
+        for b in range(batches)
+    ]
+
+
+def legacy_insert(conn, rows):
+    # the driver's previous behaviour: every value formatted into the statement
+    def format_values(values):
+        parsed = [
+            "'{}'".format(value) if isinstance(value, str) else value
+            for value in values
+        ]
+        return "(" + ",".join(map(str, parsed)) + ")"
+
+    query = "INSERT INTO sensors VALUES {}".format(
+        ",".join([format_values(row) for row in rows])
+    )
+    with conn as db:
+        db.execute(query)
+
+
+def remove(path):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def report(name, elapsed, batches, rows):
+    print(
+        "{: <10} {: >8.3f} ms/batch {: >10.0f} rows/s".format(
+            name, elapsed / batches * 1000, batches * rows / elapsed
+        )
+    )
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    batches = make_batches(args.batches, args.rows)
+
+    remove(args.path)
+    conn = sqlite3.connect(args.path)
+    conn.execute(
+        "CREATE TABLE sensors ({})".format(", ".join([" ".join(c) for c in COLS]))
+    )
+    start = time.perf_counter()
+    for rows in batches:
+        legacy_insert(conn, rows)
+    report("legacy", time.perf_counter() - start, args.batches, args.rows)
+    conn.close()
+
+    remove(args.path)
+    driver = SQLiteDriver(args.path)
+    driver.connect()
+    driver.create_table("sensors", COLS)
+    start = time.perf_counter()
+    for rows in batches:
+        driver.insert_rows("sensors", rows)
+    report("driver", time.perf_counter() - start, args.batches, args.rows)
+    driver.close()
+
+    remove(args.path)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from core.scheduler.scheduler import JobLateness
+
+
+class AsyncJob:
+    def __init__(self, name, interval_seconds, func, next_interval=None):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.next_interval = next_interval
+        # set by trigger(), created once the runtime's loop is running
+        self.wakeup = None
+
+        self.runs = 0
+        self.skipped = 0
+        self.triggered = 0
+        self.lateness = JobLateness()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "triggered": self.triggered,
+            "lateness": self.lateness.stats,
+        }
+
+
+class AsyncRuntime:
+    """Drives manager coroutines from a single event loop.
+
+    Each job runs in its own task, so a job never overlaps itself; ticks that pass
+    while a run is still in progress are counted as skipped. A job given a
+    next_interval callable sleeps for as long as it returns after each run instead
+    of the fixed interval. trigger(name) runs a job right away from any thread,
+    e.g. a sensor's callback thread, or once more as soon as its current run ends.
+
+    The loop replaces the scheduler and job runner threads, not blocking I/O: the
+    sensor, light and database calls have no non-blocking implementation, so each
+    in-flight run holds a thread of the default executor, of which there are
+    max_workers. Only the display manager's pauses between pages are awaited on
+    the loop itself.
+    """
+
+    def __init__(self, max_workers=4):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._max_workers = max_workers
+        self._jobs = dict()
+        self._tasks = []
+        self._loop = None
+
+    def every(self, interval_seconds, name, func, next_interval=None) -> AsyncJob:
+        if name in self._jobs:
+            raise ValueError("A job named {} is already scheduled".format(name))
+
+        job = AsyncJob(name, interval_seconds, func, next_interval=next_interval)
+        self._jobs[name] = job
+
+        return job
+
+    def trigger(self, name):
+        if name not in self._jobs:
+            raise ValueError("No job named {} is scheduled".format(name))
+
+        # jobs run as soon as the runtime starts, so an earlier trigger is moot
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._jobs[name].wakeup.set)
+
+    def get_stats(self) -> dict:
+        return {name: job.stats for name, job in self._jobs.items()}
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix=self.__class__.__name__
+        )
+        loop.set_default_executor(executor)
+
+        for job in self._jobs.values():
+            job.wakeup = asyncio.Event()
+        self._loop = loop
+
+        self._tasks = [
+            asyncio.create_task(self._run_job(job), name=job.name)
+            for job in self._jobs.values()
+        ]
+
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._loop = None
+            for task in self._tasks:
+                task.cancel()
+            executor.shutdown(wait=False)
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        triggered = False
+
+        while True:
+            if triggered:
+                job.triggered += 1
+            else:
+                job.lateness.record(loop.time() - next_run)
+
+            try:
+                await job.func()
+            except Exception as e:
+                self.log.error("Job {} raised an exception".format(job.name))
+                self.log.exception(e)
+
+            job.runs += 1
+            if job.next_interval is not None:
+                next_run = loop.time() + job.next_interval()
+                triggered = await self._sleep(job, next_run - loop.time())
+                continue
+
+            # a triggered run leaves the job's regular ticks where they were
+            if not triggered:
+                next_run += job.interval_seconds
+
+            nowtime = loop.time()
+            if next_run < nowtime:
+                missed = int((nowtime - next_run) // job.interval_seconds) + 1
+                job.skipped += missed
+                next_run += missed * job.interval_seconds
+
+            triggered = await self._sleep(job, next_run - nowtime)
+
+    async def _sleep(self, job, seconds) -> bool:
+        # returns whether trigger() cut the sleep short
+        if not job.wakeup.is_set():
+            try:
+                await asyncio.wait_for(job.wakeup.wait(), max(0, seconds))
+            except asyncio.TimeoutError:
+                pass
+
+        triggered = job.wakeup.is_set()
+        job.wakeup.clear()
+
+        return triggered
@@ -1,70 +1,211 @@
+import time
 import logging
+from .migrations import MIGRATIONS, OUTSIDE_TRANSACTION
+from .retention import Retention
+from .series import SensorSeries
+from core.sensor_manager.sample import Sample
+from package.database.driver.query import Query
 
 
 class DatabaseManager:
+    # a view over readings joined to sensor_info since schema version 2
     TABLE_NAME_SENSORS = "sensors"
+    TABLE_NAME_SENSOR_INFO = "sensor_info"
+    TABLE_NAME_READINGS = "readings"
+    TABLE_NAME_ROLLUPS = "rollups"
 
-    def __init__(self, driver):
+    # bucket sizes in seconds: 5 minutes, an hour and a day, as in the
+    # readings_rollups trigger
+    ROLLUP_RESOLUTIONS = [5 * 60, 60 * 60, 24 * 60 * 60]
+
+    INSERT_SENSOR_INFO = (
+        "INSERT OR IGNORE INTO sensor_info (sensor_id, name, type) VALUES (?, ?, ?)"
+    )
+    # the readings_rollups trigger adds each inserted reading to its rollups;
+    # a repeated (sensor, time) is ignored and so never counted twice
+    INSERT_READING = (
+        "INSERT OR IGNORE INTO readings (sensor_key, time, value) "
+        "SELECT id, ?, ? FROM sensor_info WHERE sensor_id = ? AND type = ?"
+    )
+
+    def __init__(self, driver, retention_policy=None):
         self.log = logging.getLogger(self.__class__.__name__)
         self._driver = driver
+        self._known_sensors = set()
+        self._retention = (
+            Retention(driver, retention_policy)
+            if retention_policy is not None
+            else None
+        )
 
         self.init_db()
 
         self.log.info("Initialized")
         self.log.debug("Driver: {}".format(self._driver))
+        if self._retention is not None:
+            self.log.debug("Retention: {}".format(retention_policy))
 
     @property
     def driver(self):
         return self._driver
 
+    @property
+    def schema_version(self) -> int:
+        return self.driver.get_schema_version()
+
     def init_db(self):
         self.driver.connect()
+        self.migrate()
 
-        try:
-            self.driver.create_table(
-                self.TABLE_NAME_SENSORS,
-                [
-                    ("sensor_id", "TEXT", "PRIMARY_KEY", "NOT NULL"),
-                    ("name", "TEXT", "NOT NULL"),
-                    ("type", "TEXT", "NOT NULL"),
-                    ("value", "REAL", "NOT NULL"),
-                    ("time", "INTEGER", "NOT NULL"),
-                ],
+    def migrate(self):
+        current_version = self.schema_version
+
+        for version, description, statements in MIGRATIONS:
+            if version <= current_version:
+                continue
+
+            self.log.info(
+                "Migrating schema to version {}: {}".format(version, description)
+            )
+            self.driver.migrate(
+                version,
+                statements,
+                transaction=version not in OUTSIDE_TRANSACTION,
             )
-        except Exception as e:
-            if "already exists" not in str(e):
-                raise e
 
     def insert_sensors(self, data):
-        insert_rows = []
-        for data_entry in data:
-            row = [
-                data_entry["id"],
-                data_entry["name"],
-                data_entry["type"],
-                data_entry["value"],
-                data_entry["time"],
+        """Inserts samples, or sample dicts, with their rollups in one transaction"""
+        new_sensors = []
+        new_keys = set()
+        readings = []
+        for sample in Sample.from_dicts(data):
+            key = sample.key
+            sensor_key = (key.id, key.type)
+            if sensor_key not in self._known_sensors and sensor_key not in new_keys:
+                new_sensors.append([key.id, key.name, key.type])
+                new_keys.add(sensor_key)
+
+            readings.append([sample.time, sample.value, key.id, key.type])
+
+        # one transaction, so a batch is written with a single commit
+        self.driver.executemany_batch(
+            [
+                (self.INSERT_SENSOR_INFO, new_sensors),
+                (self.INSERT_READING, readings),
             ]
-            insert_rows.append(row)
+        )
+        self._known_sensors |= new_keys
+
+    def prune(self) -> dict:
+        """Removes data past the retention policy and returns what the pass did"""
+        if self._retention is None:
+            return None
+
+        stats = self._retention.run().stats
+        self.log.info("Retention pass: {}".format(stats))
+
+        return stats
+
+    def get_resolution(self, window_seconds, width=None) -> int:
+        """Returns the coarsest rollup resolution giving width points, or 0 for raw readings"""
+        if width is None or width <= 0:
+            return 0
+
+        resolution = 0
+        for rollup_resolution in self.ROLLUP_RESOLUTIONS:
+            if rollup_resolution * width <= window_seconds:
+                resolution = rollup_resolution
+
+        return resolution
+
+    def get_history(self, name, type, from_seconds, to_seconds=None, width=None):
+        """Returns [{time, min, max, avg, count}] of a sensor's readings in a window.
+
+        Points come from the coarsest resolution that still gives width points, e.g.
+        a chart's pixel width. Sensors are matched by name, as their ids change each
+        run, and points from different runs in the same bucket are merged.
+        """
+        if to_seconds is None:
+            to_seconds = int(time.time())
+
+        resolution = self.get_resolution(to_seconds - from_seconds, width)
+        if resolution == 0:
+            query = (
+                "SELECT time, MIN(value), MAX(value), AVG(value), COUNT(*) "
+                "FROM readings WHERE sensor_key IN ("
+                "SELECT id FROM sensor_info WHERE name = ? AND type = ?) "
+                "AND time >= ? AND time < ? GROUP BY time ORDER BY time"
+            )
+            params = (name, type, from_seconds, to_seconds)
+        else:
+            query = (
+                "SELECT bucket, MIN(min), MAX(max), SUM(sum) / SUM(count), SUM(count) "
+                "FROM rollups WHERE resolution = ? AND sensor_key IN ("
+                "SELECT id FROM sensor_info WHERE name = ? AND type = ?) "
+                "AND bucket >= ? AND bucket < ? GROUP BY bucket ORDER BY bucket"
+            )
+            params = (
+                resolution,
+                name,
+                type,
+                from_seconds - from_seconds % resolution,
+                to_seconds,
+            )
+
+        return [
+            {"time": t, "min": mn, "max": mx, "avg": avg, "count": count}
+            for t, mn, mx, avg, count in self.driver.execute(query, params)
+        ]
+
+    def get_series(
+        self, *names, types=[], from_seconds=0, to_seconds=None, batch_size=4096
+    ) -> dict:
+        """Returns {(name, type): SensorSeries} of raw readings in a window.
+
+        Readings are read per sensor id in primary key order, a batch at a time,
+        into NumPy arrays without building a row dict. Sensors are matched by name
+        as their ids change each run; no names or types matches all sensors.
+        """
+        if to_seconds is None:
+            to_seconds = int(time.time()) + 1
+
+        query = Query(self.TABLE_NAME_SENSOR_INFO, ["id", "name", "type"])
+        if len(names) > 0:
+            query.where_in("name", names)
+        if len(types) > 0:
+            query.where_in("type", types)
+        query.order_by("id")
+
+        chunks = dict()
+        for key, name, type in self.driver.execute(*query.build()):
+            sensor_chunks = chunks.setdefault((name, type), [])
+            for rows in self.driver.stream(
+                "SELECT time, value FROM readings "
+                "WHERE sensor_key = ? AND time >= ? AND time < ? ORDER BY time",
+                (key, from_seconds, to_seconds),
+                batch_size,
+            ):
+                sensor_chunks.append(SensorSeries.to_chunk(rows))
 
-        self.driver.insert_rows(self.TABLE_NAME_SENSORS, insert_rows)
+        return {
+            (name, type): SensorSeries.from_chunks(name, type, sensor_chunks)
+            for (name, type), sensor_chunks in chunks.items()
+        }
 
     def get_sensors(self, *ids, types=[], from_seconds=-1):
-        where = []
-        limit = None
+        query = Query(self.TABLE_NAME_SENSORS, ["sensor_id", "name", "value", "time"])
 
         if len(ids) > 0:
-            where.append("sensor_id IN ({})".format(ids))
+            query.where_in("sensor_id", ids)
         if len(types) > 0:
-            where.append("type IN ('{}')".format(",".join(types)))
+            query.where_in("type", types)
         if from_seconds > 0:
-            where.append("time > {}".format(from_seconds))
+            query.where_range("time", lower=from_seconds, lower_inclusive=False)
         elif from_seconds == 0:
-            limit = 1
+            query.limit(1)
         elif from_seconds == -1:
-            where.append("time > 0")
+            query.where_range("time", lower=0, lower_inclusive=False)
 
-        cols = ["sensor_id", "name", "value", "time"]
-        order_by = ["sensor_id", "time DESC"]
+        query.order_by("sensor_id", "time DESC")
 
-        return self.driver.select(self.TABLE_NAME_SENSORS, cols, where, order_by, limit)
+        return self.driver.query(query)
@@ -0,0 +1,427 @@
+import time
+import logging
+import threading
+from collections import deque
+
+
+class IngestionStats:
+    def __init__(self):
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.replayed = 0
+        self.unspooled = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_write_seconds = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "replayed": self.replayed,
+            "unspooled": self.unspooled,
+            "batches": self.batches,
+            "max_depth": self.max_depth,
+            "last_write_ms": round(self.last_write_seconds * 1000, 3),
+        }
+
+
+class IngestionQueue:
+    """Buffers samples in memory for a writer thread to insert in batches.
+
+    The writer inserts a batch of up to batch_size samples, in one transaction,
+    once that many are queued or the oldest has waited max_age_seconds. put()
+    waits up to block_seconds for room when max_queued samples are waiting for a
+    slow disk, then drops what still doesn't fit and counts it. A batch that
+    fails to write is retried after retry_seconds, up to max_attempts times.
+
+    With a SampleSpool the writer journals whatever was put since it last looked,
+    before writing anything, as one record with a single fsync, so put() doesn't
+    wait on the disk. Up to max_unjournalled samples wait for the writer; put()
+    journals any more itself. Samples the queue dropped or gave up on are replayed
+    from the spool once the queue has drained, as is whatever was left in it by a
+    restart; the database's INSERT OR IGNORE skips readings it already has. The
+    spool is emptied whenever everything in it has been written.
+    """
+
+    def __init__(
+        self,
+        database_manager,
+        batch_size=500,
+        max_age_seconds=5,
+        max_queued=10000,
+        block_seconds=0,
+        retry_seconds=5,
+        max_attempts=5,
+        spool=None,
+        max_unjournalled=None,
+    ):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._db = database_manager
+        self._batch_size = batch_size
+        self._max_age_seconds = max_age_seconds
+        self._max_queued = max_queued
+        self._block_seconds = block_seconds
+        self._retry_seconds = retry_seconds
+        self._max_attempts = max_attempts
+        self._spool = spool
+        self._max_unjournalled = (
+            max_unjournalled if max_unjournalled is not None else max_queued
+        )
+
+        self._samples = deque()
+        # put but not yet appended to the spool by the writer
+        self._unjournalled = []
+        self._oldest_time = None
+        self._writing = 0
+        self._stopping = False
+        self._flush_requested = False
+        self._attempts = 0
+        self._retry_time = 0
+        self._replay_pending = False
+        self._condition = threading.Condition()
+        self._stats = IngestionStats()
+        self._writer = None
+
+        self.log.debug(
+            "Batches of {} after {} seconds, at most {} queued".format(
+                batch_size, max_age_seconds, max_queued
+            )
+        )
+
+    @property
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._samples)
+
+    @property
+    def stats(self) -> dict:
+        with self._condition:
+            return self._stats.stats
+
+    def start(self):
+        with self._condition:
+            if self._writer is not None:
+                return self
+
+            self._stopping = False
+            if self._spool is not None and self._spool.records > 0:
+                self._replay_pending = True
+
+            self._writer = threading.Thread(
+                target=self._write_loop, name=self.__class__.__name__, daemon=True
+            )
+            self._writer.start()
+
+        return self
+
+    def put(self, samples) -> int:
+        """Queues samples for writing and returns how many had to be dropped"""
+        deadline = time.monotonic() + self._block_seconds
+        overflow = []
+
+        with self._condition:
+            while len(self._samples) + len(samples) > self._max_queued:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stopping:
+                    break
+
+                self._condition.wait(remaining)
+
+            room = max(0, self._max_queued - len(self._samples))
+            dropped = max(0, len(samples) - room)
+            if dropped > 0:
+                self._stats.dropped += dropped
+                self.log.warning(
+                    "Queue full, dropped {} sample(s) ({} in total)".format(
+                        dropped, self._stats.dropped
+                    )
+                )
+
+            # dropped samples are journalled too, to be replayed later
+            overflow = self._add_unjournalled(samples)
+            if dropped > 0 and self._spool is not None:
+                self._replay_pending = True
+
+            samples = samples[:room]
+            if len(samples) > 0:
+                if len(self._samples) == 0:
+                    self._oldest_time = time.monotonic()
+
+                self._samples.extend(samples)
+                self._stats.queued += len(samples)
+                self._stats.max_depth = max(self._stats.max_depth, len(self._samples))
+
+            self._condition.notify_all()
+
+        if len(overflow) > 0:
+            self._journal_overflow(overflow)
+
+        return dropped
+
+    def flush(self, timeout=None) -> bool:
+        """Has the writer insert everything queued; returns False on timeout"""
+        with self._condition:
+            if self._writer is None:
+                self._write_all()
+                return True
+
+            if len(self._samples) > 0:
+                self._flush_requested = True
+                self._condition.notify_all()
+
+            return self._condition.wait_for(self._is_drained, timeout)
+
+    def stop(self, timeout=None):
+        """Stops the writer once it has inserted everything still queued"""
+        with self._condition:
+            writer = self._writer
+            self._stopping = True
+            self._condition.notify_all()
+
+        if writer is not None:
+            writer.join(timeout)
+            if writer.is_alive():
+                self.log.warning(
+                    "Writer still busy after {} seconds, {} sample(s) queued".format(
+                        timeout, self.depth
+                    )
+                )
+                return
+
+        with self._condition:
+            self._writer = None
+            self._write_all()
+
+        if self._spool is not None:
+            self._spool.close()
+
+        self.log.info("Stopped: {}".format(self.stats))
+
+    def _write_all(self):
+        # only called with the condition held and no writer thread running
+        if len(self._unjournalled) > 0:
+            self._journal()
+
+        while len(self._samples) > 0:
+            batch = self._take()
+            if not self._finish_write(batch, *self._insert(batch)):
+                # left in the spool, if there is one, for the next start
+                return
+
+        if self._is_checkpoint_ready():
+            self._checkpoint()
+
+    def _write_loop(self):
+        with self._condition:
+            while True:
+                if len(self._unjournalled) > 0:
+                    self._journal()
+                    continue
+
+                if self._is_checkpoint_ready():
+                    self._checkpoint()
+                    continue
+
+                if not self._is_batch_ready():
+                    if self._stopping and len(self._samples) == 0:
+                        return
+
+                    self._condition.wait(self._get_wait_seconds())
+                    continue
+
+                batch = self._take()
+                self._writing += 1
+                self._condition.release()
+                try:
+                    result = self._insert(batch)
+                finally:
+                    self._condition.acquire()
+                    self._writing -= 1
+
+                self._finish_write(batch, *result)
+                if len(self._samples) == 0:
+                    self._flush_requested = False
+                self._condition.notify_all()
+
+    def _is_drained(self) -> bool:
+        return (
+            len(self._samples) == 0 and self._writing == 0 and not self._replay_pending
+        )
+
+    def _is_batch_ready(self) -> bool:
+        if len(self._samples) == 0 or time.monotonic() < self._retry_time:
+            return False
+        if self._stopping or self._flush_requested:
+            return True
+        if len(self._samples) >= self._batch_size:
+            return True
+
+        return time.monotonic() - self._oldest_time >= self._max_age_seconds
+
+    def _is_checkpoint_ready(self) -> bool:
+        if self._spool is None or len(self._samples) > 0 or self._writing > 0:
+            return False
+        if len(self._unjournalled) > 0:
+            return False
+        if time.monotonic() < self._retry_time:
+            return False
+
+        return self._replay_pending or self._spool.records > 0
+
+    def _get_wait_seconds(self):
+        nowtime = time.monotonic()
+        if nowtime < self._retry_time:
+            return self._retry_time - nowtime
+        if len(self._samples) == 0:
+            return None
+
+        return max(0, self._oldest_time + self._max_age_seconds - nowtime)
+
+    def _take(self) -> list:
+        batch = []
+        while len(batch) < self._batch_size and len(self._samples) > 0:
+            batch.append(self._samples.popleft())
+
+        # the rest were queued after the taken ones, so keeping the oldest time
+        # can only overstate their age and write them early, never late
+        if len(self._samples) == 0:
+            self._oldest_time = None
+
+        return batch
+
+    def _add_unjournalled(self, samples) -> list:
+        # returns the samples there was no room to leave to the writer
+        if self._spool is None:
+            return []
+
+        room = max(0, self._max_unjournalled - len(self._unjournalled))
+        self._unjournalled.extend(samples[:room])
+
+        return samples[room:]
+
+    def _journal_overflow(self, samples):
+        # called without the condition held, on the thread that put the samples
+        self.log.warning(
+            "Writer is behind, journalling {} sample(s) in put()".format(len(samples))
+        )
+        try:
+            unspooled = self._spool.append(samples)
+        except Exception as e:
+            self.log.error("Failed to journal {} sample(s): {}".format(len(samples), e))
+            unspooled = len(samples)
+
+        if unspooled > 0:
+            with self._condition:
+                self._stats.unspooled += unspooled
+            self.log.warning(
+                "{} sample(s) not journalled, the spool is full or "
+                "their values aren't numbers".format(unspooled)
+            )
+
+    def _journal(self):
+        # called with the condition held; appends and fsyncs without it
+        samples = self._unjournalled
+        self._unjournalled = []
+
+        self._condition.release()
+        try:
+            unspooled = self._spool.append(samples)
+        except Exception as e:
+            self.log.error("Failed to journal {} sample(s): {}".format(len(samples), e))
+            unspooled = len(samples)
+        finally:
+            self._condition.acquire()
+
+        if unspooled > 0:
+            self._stats.unspooled += unspooled
+            self.log.warning(
+                "{} sample(s) not journalled, the spool is full or "
+                "their values aren't numbers".format(unspooled)
+            )
+
+    def _insert(self, batch) -> tuple:
+        # returns (error, seconds) and is called without the condition held
+        start_time = time.monotonic()
+        try:
+            self._db.insert_sensors(batch)
+        except Exception as e:
+            return e, time.monotonic() - start_time
+
+        return None, time.monotonic() - start_time
+
+    def _finish_write(self, batch, error, seconds) -> bool:
+        if error is None:
+            self._attempts = 0
+            self._stats.written += len(batch)
+            self._stats.batches += 1
+            self._stats.last_write_seconds = seconds
+            return True
+
+        self._attempts += 1
+        self._retry_time = time.monotonic() + self._retry_seconds
+        self.log.error(
+            "Failed to write {} sample(s), attempt {} of {}: {}".format(
+                len(batch), self._attempts, self._max_attempts, error
+            )
+        )
+
+        if self._attempts < self._max_attempts:
+            self._stats.retries += 1
+            self._samples.extendleft(reversed(batch))
+            if self._oldest_time is None:
+                self._oldest_time = time.monotonic()
+        else:
+            self._attempts = 0
+            self._stats.failed += len(batch)
+            if self._spool is not None:
+                self._replay_pending = True
+
+        return False
+
+    def _checkpoint(self):
+        # called with the condition held, once everything journalled has been
+        # written; a put() may append overflow meanwhile, so the spool is only
+        # reset if it holds no more records than were known to be written
+        if not self._replay_pending:
+            records = self._spool.records
+            self._condition.release()
+            try:
+                self._spool.reset(records)
+            finally:
+                self._condition.acquire()
+            return
+
+        self._writing += 1
+        self._condition.release()
+        try:
+            batches = self._spool.read()
+            error = None
+            for batch in batches:
+                error, _ = self._insert(batch)
+                if error is not None:
+                    break
+            if error is None:
+                reset = self._spool.reset(len(batches))
+        finally:
+            self._condition.acquire()
+            self._writing -= 1
+
+        if error is not None:
+            self._retry_time = time.monotonic() + self._retry_seconds
+            self.log.error("Failed to replay {}: {}".format(self._spool, error))
+            return
+
+        # records appended while replaying are replayed by the next checkpoint
+        self._replay_pending = not reset
+        self._stats.replayed += sum(len(batch) for batch in batches)
+        self.log.info("Replayed {} sample record(s)".format(len(batches)))
+        self._condition.notify_all()
@@ -0,0 +1,146 @@
+# Each migration is (version, description, statements). A database records the
+# last version applied in its schema version and only later migrations are run.
+# Migrations in OUTSIDE_TRANSACTION run without a transaction, e.g. for VACUUM.
+MIGRATIONS = [
+    (
+        1,
+        "sensors readings table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS sensors (
+                sensor_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value REAL NOT NULL,
+                time INTEGER NOT NULL
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "normalized sensor_info dimension and time-ordered readings",
+        [
+            """
+            CREATE TABLE sensor_info (
+                id INTEGER PRIMARY KEY,
+                sensor_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                UNIQUE (sensor_id, type)
+            )
+            """,
+            # clustered on (sensor, time) so a sensor's readings are stored in order
+            """
+            CREATE TABLE readings (
+                sensor_key INTEGER NOT NULL REFERENCES sensor_info (id),
+                time INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (sensor_key, time)
+            ) WITHOUT ROWID
+            """,
+            """
+            INSERT INTO sensor_info (sensor_id, name, type)
+            SELECT sensor_id, MAX(name), type FROM sensors GROUP BY sensor_id, type
+            """,
+            """
+            INSERT OR REPLACE INTO readings (sensor_key, time, value)
+            SELECT sensor_info.id, sensors.time, sensors.value
+            FROM sensors
+            JOIN sensor_info
+                ON sensor_info.sensor_id = sensors.sensor_id
+                AND sensor_info.type = sensors.type
+            """,
+            "DROP TABLE sensors",
+            # keeps the old table's shape for existing queries
+            """
+            CREATE VIEW sensors AS
+            SELECT
+                sensor_info.sensor_id AS sensor_id,
+                sensor_info.name AS name,
+                sensor_info.type AS type,
+                readings.value AS value,
+                readings.time AS time
+            FROM readings
+            JOIN sensor_info ON sensor_info.id = readings.sensor_key
+            """,
+        ],
+    ),
+    (
+        3,
+        "min/max/sum/count rollups at 5 minute, hourly and daily resolution",
+        [
+            """
+            CREATE TABLE rollups (
+                resolution INTEGER NOT NULL,
+                sensor_key INTEGER NOT NULL REFERENCES sensor_info (id),
+                bucket INTEGER NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                sum REAL NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (resolution, sensor_key, bucket)
+            ) WITHOUT ROWID
+            """,
+            """
+            INSERT INTO rollups (resolution, sensor_key, bucket, min, max, sum, count)
+            SELECT
+                resolutions.seconds,
+                readings.sensor_key,
+                readings.time - readings.time % resolutions.seconds,
+                MIN(readings.value),
+                MAX(readings.value),
+                SUM(readings.value),
+                COUNT(*)
+            FROM readings, (
+                SELECT 300 AS seconds UNION ALL SELECT 3600 UNION ALL SELECT 86400
+            ) AS resolutions
+            GROUP BY 1, 2, 3
+            """,
+        ],
+    ),
+    (
+        4,
+        "incremental auto_vacuum, rebuilding the database file once",
+        [
+            # retention then frees pages with PRAGMA incremental_vacuum
+            "PRAGMA auto_vacuum = INCREMENTAL",
+            "VACUUM",
+        ],
+    ),
+    (
+        5,
+        "maintain rollups from a trigger on newly inserted readings",
+        [
+            # a reading ignored as a duplicate of (sensor_key, time) fires nothing,
+            # so rollups only ever count the rows readings actually holds
+            """
+            CREATE TRIGGER readings_rollups AFTER INSERT ON readings
+            BEGIN
+                INSERT INTO rollups (
+                    resolution, sensor_key, bucket, min, max, sum, count
+                )
+                SELECT
+                    resolutions.seconds,
+                    NEW.sensor_key,
+                    NEW.time - NEW.time % resolutions.seconds,
+                    NEW.value,
+                    NEW.value,
+                    NEW.value,
+                    1
+                FROM (
+                    SELECT 300 AS seconds UNION ALL SELECT 3600 UNION ALL SELECT 86400
+                ) AS resolutions
+                WHERE true
+                ON CONFLICT (resolution, sensor_key, bucket) DO UPDATE SET
+                    min = MIN(min, excluded.min),
+                    max = MAX(max, excluded.max),
+                    sum = sum + excluded.sum,
+                    count = count + 1;
+            END
+            """,
+        ],
+    ),
+]
+
+OUTSIDE_TRANSACTION = {4}
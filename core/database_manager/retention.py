@@ -0,0 +1,134 @@
+import time
+import logging
+
+
+class RetentionPolicy:
+    """How long raw readings and each rollup resolution are kept, in seconds.
+
+    None keeps data forever. rollup_seconds maps a rollup resolution to its
+    retention; resolutions it leaves out are kept forever.
+    """
+
+    def __init__(
+        self,
+        raw_seconds=None,
+        rollup_seconds=None,
+        batch_size=500,
+        pause_seconds=0.05,
+        vacuum_pages=0,
+    ):
+        self.raw_seconds = raw_seconds
+        self.rollup_seconds = rollup_seconds or {}
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.vacuum_pages = vacuum_pages
+
+    def __str__(self):
+        return "RetentionPolicy(raw={}, rollups={}, batch={}, vacuum={})".format(
+            self.raw_seconds, self.rollup_seconds, self.batch_size, self.vacuum_pages
+        )
+
+
+class RetentionPass:
+    def __init__(self):
+        self.readings = 0
+        self.rollups = 0
+        self.batches = 0
+        self.vacuumed_pages = 0
+        self.seconds = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "readings": self.readings,
+            "rollups": self.rollups,
+            "batches": self.batches,
+            "vacuumed_pages": self.vacuumed_pages,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class Retention:
+    """Prunes data older than a RetentionPolicy allows in small batches.
+
+    Each batch is one sensor's oldest rows, found through the primary key, and is
+    its own short transaction with a pause after it, so inserts are never held
+    up for long by a pass.
+    """
+
+    # per sensor, so both the delete and its batch search the primary key
+    SELECT_SENSOR_KEYS = "SELECT id FROM sensor_info ORDER BY id"
+    DELETE_READINGS = (
+        "DELETE FROM readings WHERE sensor_key = ?1 AND time IN ("
+        "SELECT time FROM readings WHERE sensor_key = ?1 AND time < ?2 "
+        "ORDER BY time LIMIT ?3)"
+    )
+    DELETE_ROLLUPS = (
+        "DELETE FROM rollups WHERE resolution = ?1 AND sensor_key = ?2 AND bucket IN ("
+        "SELECT bucket FROM rollups WHERE resolution = ?1 AND sensor_key = ?2 "
+        "AND bucket < ?3 ORDER BY bucket LIMIT ?4)"
+    )
+
+    def __init__(self, driver, policy):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._driver = driver
+        self._policy = policy
+
+    @property
+    def policy(self) -> RetentionPolicy:
+        return self._policy
+
+    def run(self, nowtime=None) -> RetentionPass:
+        retention_pass = RetentionPass()
+        start_time = time.monotonic()
+        if nowtime is None:
+            nowtime = int(time.time())
+
+        sensor_keys = [row[0] for row in self._driver.execute(self.SELECT_SENSOR_KEYS)]
+
+        if self._policy.raw_seconds is not None:
+            for sensor_key in sensor_keys:
+                retention_pass.readings += self._prune(
+                    retention_pass,
+                    self.DELETE_READINGS,
+                    sensor_key,
+                    nowtime - self._policy.raw_seconds,
+                )
+
+        for resolution, seconds in sorted(self._policy.rollup_seconds.items()):
+            if seconds is None:
+                continue
+
+            for sensor_key in sensor_keys:
+                retention_pass.rollups += self._prune(
+                    retention_pass,
+                    self.DELETE_ROLLUPS,
+                    resolution,
+                    sensor_key,
+                    nowtime - seconds,
+                )
+
+        if self._policy.vacuum_pages > 0:
+            retention_pass.vacuumed_pages = self._driver.reclaim_space(
+                self._policy.vacuum_pages
+            )
+
+        retention_pass.seconds = time.monotonic() - start_time
+
+        return retention_pass
+
+    def _prune(self, retention_pass, query, *params) -> int:
+        removed = 0
+
+        while True:
+            count = self._driver.execute_update(
+                query, params + (self._policy.batch_size,)
+            )
+            retention_pass.batches += 1
+            removed += count
+
+            if count < self._policy.batch_size:
+                return removed
+
+            time.sleep(self._policy.pause_seconds)
@@ -0,0 +1,48 @@
+import numpy as np
+
+READING_DTYPE = np.dtype([("time", np.int64), ("value", np.float64)])
+
+
+class SensorSeries:
+    """A sensor's readings of one type as parallel time and value arrays"""
+
+    def __init__(self, name, type, times, values):
+        self.name = name
+        self.type = type
+        self.times = times
+        self.values = values
+
+    @staticmethod
+    def from_chunks(name, type, chunks):
+        """Builds a series from READING_DTYPE chunks, each already in time order"""
+        if len(chunks) == 0:
+            readings = np.empty(0, dtype=READING_DTYPE)
+        else:
+            readings = np.concatenate(chunks)
+
+        # chunks from different sensor ids can overlap if runs overlapped
+        if len(readings) > 1 and np.any(readings["time"][1:] < readings["time"][:-1]):
+            readings = readings[np.argsort(readings["time"], kind="stable")]
+
+        return SensorSeries(
+            name,
+            type,
+            np.ascontiguousarray(readings["time"]),
+            np.ascontiguousarray(readings["value"]),
+        )
+
+    @staticmethod
+    def to_chunk(rows):
+        """Converts a batch of (time, value) rows to a READING_DTYPE array"""
+        return np.fromiter(rows, dtype=READING_DTYPE, count=len(rows))
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return "SensorSeries({}, {}, {} readings)".format(
+            self.name, self.type, len(self)
+        )
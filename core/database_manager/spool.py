@@ -0,0 +1,214 @@
+import os
+import zlib
+import struct
+import logging
+import threading
+from core.sensor_manager.sample import Sample, SampleKey
+
+
+class SampleSpool:
+    """An append-only file journalling samples until they're in the database.
+
+    Each append is one record, a batch of samples behind its length and CRC32,
+    written with a single fsync. Opening the spool drops a torn or corrupt record
+    at the end, so a power cut loses at most the batch being written. Appends
+    that would grow the file past max_bytes are refused.
+    """
+
+    HEADER = struct.Struct("<II")
+    COUNT = struct.Struct("<I")
+    # time, value and the lengths of the id, name and type that follow
+    SAMPLE = struct.Struct("<qdHHH")
+
+    def __init__(self, path, max_bytes=4 * 1024 * 1024):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._path = path
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._records = 0
+        # encoded id, name and type per key, as a sensor's keys are shared
+        self._encoded_keys = dict()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def records(self) -> int:
+        return self._records
+
+    def open(self):
+        with self._lock:
+            self._file = open(self._path, "ab+")
+            self._records, self._size = self._scan()
+
+            if self._size < os.path.getsize(self._path):
+                self.log.warning(
+                    "Dropping {} byte(s) of torn or corrupt records from {}".format(
+                        os.path.getsize(self._path) - self._size, self._path
+                    )
+                )
+                self._file.truncate(self._size)
+                self._sync()
+
+        if self._records > 0:
+            self.log.info(
+                "{} record(s) to replay from {}".format(self._records, self._path)
+            )
+
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def append(self, samples) -> int:
+        """Journals samples as one record; returns how many didn't fit or were invalid"""
+        payload, skipped = self.encode(samples)
+        if skipped == len(samples):
+            return skipped
+
+        record = self.HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._size + len(record) > self._max_bytes:
+                return len(samples)
+
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(record)
+            self._sync()
+            self._size += len(record)
+            self._records += 1
+
+        return skipped
+
+    def read(self) -> list:
+        """Returns the samples of every intact record, in the order appended"""
+        with self._lock:
+            batches = []
+            self._file.seek(0)
+            for payload in self._read_payloads():
+                batches.append(self.decode(payload))
+
+            return batches
+
+    def reset(self, records=None) -> bool:
+        """Empties the spool once everything in it is in the database.
+
+        Given the number of records known to be written, it's only emptied if no
+        more were appended since; returns whether it was.
+        """
+        with self._lock:
+            if records is not None and records != self._records:
+                return False
+
+            self._file.truncate(0)
+            self._sync()
+            self._size = 0
+            self._records = 0
+            self._encoded_keys.clear()
+
+        return True
+
+    def encode(self, samples) -> tuple[bytes, int]:
+        parts = []
+        skipped = 0
+        for sample in Sample.from_dicts(samples):
+            try:
+                value = float(sample.value)
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+
+            encoded_key = self._encoded_keys.get(sample.key)
+            if encoded_key is None:
+                encoded_key = self._encode_key(sample.key)
+                self._encoded_keys[sample.key] = encoded_key
+
+            lengths, key_bytes = encoded_key
+            parts.append(self.SAMPLE.pack(sample.time, value, *lengths))
+            parts.append(key_bytes)
+
+        return self.COUNT.pack(len(parts) // 2) + b"".join(parts), skipped
+
+    def decode(self, payload) -> list[Sample]:
+        samples = []
+        keys = dict()
+        (count,) = self.COUNT.unpack_from(payload)
+        offset = self.COUNT.size
+        for _ in range(count):
+            time, value, id_len, name_len, type_len = self.SAMPLE.unpack_from(
+                payload, offset
+            )
+            offset += self.SAMPLE.size
+            key_len = id_len + name_len + type_len
+            key_bytes = payload[offset : offset + key_len]
+            offset += key_len
+
+            # the lengths too, as different splits of the same bytes are different keys
+            cache_key = (id_len, name_len, key_bytes)
+            key = keys.get(cache_key)
+            if key is None:
+                key = SampleKey(
+                    key_bytes[:id_len].decode(),
+                    key_bytes[id_len : id_len + name_len].decode(),
+                    key_bytes[id_len + name_len :].decode(),
+                )
+                keys[cache_key] = key
+
+            samples.append(Sample(key, value, time))
+
+        return samples
+
+    @staticmethod
+    def _encode_key(key) -> tuple[tuple, bytes]:
+        id = key.id.encode()
+        name = key.name.encode()
+        type = key.type.encode()
+
+        return (len(id), len(name), len(type)), id + name + type
+
+    def _scan(self) -> tuple[int, int]:
+        # returns the number and total size of the intact records at the start
+        records = 0
+        size = 0
+        self._file.seek(0)
+        for payload in self._read_payloads():
+            records += 1
+            size += self.HEADER.size + len(payload)
+
+        return records, size
+
+    def _read_payloads(self):
+        while True:
+            header = self._file.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                return
+
+            length, crc = self.HEADER.unpack(header)
+            payload = self._file.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+
+            yield payload
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return "SampleSpool({}, {} record(s), {} bytes)".format(
+            self._path, self._records, self._size
+        )
@@ -1,8 +1,10 @@
 import time
+import asyncio
 import logging
 import threading
 import util.utils as utils
 from datetime import datetime
+from package.display.driver.driver import DisplayDriver
 from .page.device_page import DevicePage
 from .page.hygrometer_page import HygrometerPage
 from .page.environment_page import EnvironmentPage
@@ -20,6 +22,17 @@ class DisplayManager:
     HOURS_IN_DAY = 24
     HOURS_IN_WEEK = 168
 
+    PAGE_STEPS = [
+        STEP_HYGROMETER,
+        STEP_WAIT,
+        STEP_ENVIRONMENT,
+        STEP_WAIT,
+        # STEP_24HR_HISTORICAL,
+        # STEP_7DAY_HISTORICAL,
+        # STEP_DEVICE,
+        STEP_HYGROMETER,
+    ]
+
     def __init__(
         self,
         driver,
@@ -65,6 +78,25 @@ class DisplayManager:
             self.pause(2)
 
     def run(self):
+        latest_render_hour = self.get_latest_render_hour()
+
+        if self._current_render_hour != latest_render_hour:
+            self.display_pages()
+            # self.sleep()
+
+            self._render_time = time.time()
+            self._current_render_hour = latest_render_hour
+
+    async def run_async(self):
+        latest_render_hour = self.get_latest_render_hour()
+
+        if self._current_render_hour != latest_render_hour:
+            await self.display_pages_async()
+
+            self._render_time = time.time()
+            self._current_render_hour = latest_render_hour
+
+    def get_latest_render_hour(self):
         nowdate = datetime.now()
         latest_render_hour = None
         for render_hour in self._refresh_schedule:
@@ -73,12 +105,7 @@ class DisplayManager:
             if nowdate >= render_hour_dt:
                 latest_render_hour = render_hour_dt
 
-        if self._current_render_hour != latest_render_hour:
-            self.display_pages()
-            # self.sleep()
-
-            self._render_time = time.time()
-            self._current_render_hour = latest_render_hour
+        return latest_render_hour
 
     def flush(self):
         self.log.debug("Flushing")
@@ -91,36 +118,42 @@ class DisplayManager:
         frame = page.draw()
         self.draw_to_display(frame)
 
+    async def display_page_async(self, page):
+        self.log.debug("Rendering page {}".format(page.__class__.__name__))
+        frame = await utils.run_blocking(page.draw)
+        await self.draw_to_display_async(frame)
+
+    def get_step_page(self, step):
+        """Returns the page a step draws, or None for steps that draw nothing"""
+        if step == self.STEP_HYGROMETER:
+            return self.hygrometer_page
+
+        if step == self.STEP_ENVIRONMENT:
+            return self.environment_page
+
+        # STEP_24HR_HISTORICAL and STEP_7DAY_HISTORICAL would draw
+        # self.historical_data_page for HOURS_IN_DAY and HOURS_IN_WEEK
+        return None
+
     def display_pages(self):
-        steps = [
-            self.STEP_HYGROMETER,
-            self.STEP_WAIT,
-            self.STEP_ENVIRONMENT,
-            self.STEP_WAIT,
-            # self.STEP_24HR_HISTORICAL,
-            # self.STEP_7DAY_HISTORICAL,
-            # self.STEP_DEVICE,
-            self.STEP_HYGROMETER,
-        ]
-
-        for step in steps:
+        for step in self.PAGE_STEPS:
             if step == self.STEP_WAIT:
                 self.pause(self._step_wait_seconds)
                 continue
 
-            if step == self.STEP_HYGROMETER:
-                self.display_page(self.hygrometer_page)
+            page = self.get_step_page(step)
+            if page is not None:
+                self.display_page(page)
 
-            if step == self.STEP_ENVIRONMENT:
-                self.display_page(self.environment_page)
-
-            if step == self.STEP_24HR_HISTORICAL:
-                # self.draw_historical_data(self.HOURS_IN_DAY)
-                pass
+    async def display_pages_async(self):
+        for step in self.PAGE_STEPS:
+            if step == self.STEP_WAIT:
+                await self.pause_async(self._step_wait_seconds)
+                continue
 
-            if step == self.STEP_7DAY_HISTORICAL:
-                # self.draw_historical_data(self.HOURS_IN_WEEK)
-                pass
+            page = self.get_step_page(step)
+            if page is not None:
+                await self.display_page_async(page)
 
     def draw_to_display(self, frame, block_execution=False):
         def draw():
@@ -134,6 +167,17 @@ class DisplayManager:
         if block_execution:
             t.join()
 
+    async def draw_to_display_async(self, frame):
+        if isinstance(self.driver, DisplayDriver):
+            await self.driver.init_async()
+            await self.driver.clear_async()
+            await self.driver.display_async(frame)
+        else:
+            # remote drivers don't share the DisplayDriver interface
+            await utils.run_blocking(self.driver.init)
+            await utils.run_blocking(self.driver.clear)
+            await utils.run_blocking(self.driver.display, frame)
+
     def sleep(self):
         if not self.debug:
             self.driver.sleep()
@@ -142,5 +186,9 @@ class DisplayManager:
         self.log.debug("Pausing for {} second(s)...".format(seconds))
         self._delay_ms(seconds * 1000)
 
+    async def pause_async(self, seconds):
+        self.log.debug("Pausing for {} second(s)...".format(seconds))
+        await asyncio.sleep(seconds)
+
     def _delay_ms(self, delaytime):
         time.sleep(delaytime / 1000.0)
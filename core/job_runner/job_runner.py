@@ -0,0 +1,136 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    def __init__(self, name, func, policy):
+        self.name = name
+        self.func = func
+        self.policy = policy
+
+        self.running = False
+        self.queued = False
+
+        self.runs = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.queued_ticks = 0
+        self.last_duration = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "overruns": self.overruns,
+            "queued": self.queued_ticks,
+            "last_duration": round(self.last_duration, 3),
+        }
+
+
+class JobRunner:
+    """Runs manager jobs on a fixed worker pool with at most one run per job in flight.
+
+    A tick that arrives while the job's previous run is still going is an overrun.
+    With the skip policy it is dropped; with the coalesce policy it is queued so the
+    job runs once more when the current run finishes, and any further ticks are dropped.
+
+    By default the pool has one worker per job added before the first submit, so a
+    job never waits behind another's long run.
+    """
+
+    POLICY_SKIP = "skip"
+    POLICY_COALESCE = "coalesce"
+
+    def __init__(self, max_workers=None):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._max_workers = max_workers
+        # created on the first submit, once the jobs are known
+        self._executor = None
+        self._jobs = dict()
+        self._lock = threading.Lock()
+
+    def add_job(self, name, func, policy=POLICY_COALESCE) -> Job:
+        if policy not in (self.POLICY_SKIP, self.POLICY_COALESCE):
+            raise ValueError("Unsupported job policy: {}".format(policy))
+
+        job = Job(name, func, policy)
+        with self._lock:
+            self._jobs[name] = job
+
+        return job
+
+    def submit(self, name) -> bool:
+        """Starts job name unless it is already running; returns whether it was started."""
+        with self._lock:
+            job = self._jobs[name]
+
+            if job.running:
+                job.overruns += 1
+                if job.policy == self.POLICY_COALESCE and not job.queued:
+                    job.queued = True
+                    job.queued_ticks += 1
+                    self.log.debug("{} still running, queued next run".format(name))
+                else:
+                    job.skipped += 1
+                    self.log.debug("{} still running, skipped tick".format(name))
+
+                return False
+
+            job.running = True
+            if self._executor is None:
+                self._executor = self._create_executor()
+
+        self._executor.submit(self._run, job)
+
+        return True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {name: job.stats for name, job in self._jobs.items()}
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor = self._executor
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _create_executor(self) -> ThreadPoolExecutor:
+        # called with the lock held
+        max_workers = self._max_workers
+        if max_workers is None:
+            max_workers = max(1, len(self._jobs))
+        elif max_workers < len(self._jobs):
+            self.log.warning(
+                "{} worker(s) for {} jobs, some runs will wait for a free worker".format(
+                    max_workers, len(self._jobs)
+                )
+            )
+
+        return ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=self.__class__.__name__
+        )
+
+    def _run(self, job):
+        while True:
+            start_time = time.monotonic()
+            try:
+                job.func()
+            except Exception as e:
+                self.log.error("Job {} raised an exception".format(job.name))
+                self.log.exception(e)
+
+            with self._lock:
+                job.runs += 1
+                job.last_duration = time.monotonic() - start_time
+
+                if job.queued:
+                    job.queued = False
+                    continue
+
+                job.running = False
+                return
@@ -0,0 +1,164 @@
+import time
+import logging
+import threading
+from core.sensor_manager.read_cache import SensorReadCache
+from package.sensor.environment.environment import MotionSensor
+
+
+class MotionEvent:
+    __slots__ = ("sensor", "motion", "time")
+
+    def __init__(self, sensor, motion, event_time):
+        self.sensor = sensor
+        self.motion = motion
+        self.time = event_time
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.time
+
+
+class MotionEventSource:
+    """Turns a set of motion sensors into debounced motion start/stop events.
+
+    Sensors that support motion events push their edges as they happen; the rest
+    are read afresh by poll(), through a read cache shared with other managers so
+    their readings are reused by them, and only emit an event when their reading
+    changes. A motion start within debounce_seconds of the sensor's previous one
+    updates its state without notifying listeners. Listeners are called as
+    listener(event) on the thread the edge arrived on.
+    """
+
+    def __init__(self, sensors, debounce_seconds=1, read_cache=None):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._debounce_seconds = debounce_seconds
+        self._read_cache = read_cache if read_cache is not None else SensorReadCache()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        self._motion = {sensor: False for sensor in sensors}
+        self._last_start = {sensor: 0 for sensor in sensors}
+
+        self.events = 0
+        self.debounced = 0
+        self.polls = 0
+
+        self.event_sensors = []
+        self.polled_sensors = []
+        for sensor in sensors:
+            if sensor.supports_motion_events:
+                sensor.add_motion_callback(self.on_edge)
+                self.event_sensors.append(sensor)
+            else:
+                self.polled_sensors.append(sensor)
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    @property
+    def motion(self) -> bool:
+        """Returns whether any sensor's last known state is motion, without reading it"""
+        with self._lock:
+            return any(self._motion.values())
+
+    @property
+    def needs_polling(self) -> bool:
+        return len(self.polled_sensors) > 0
+
+    @property
+    def read_cache(self) -> SensorReadCache:
+        return self._read_cache
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "events": self.events,
+            "debounced": self.debounced,
+            "polls": self.polls,
+        }
+
+    def poll(self):
+        """Reads the sensors that can't push events and emits any changes.
+
+        Nothing is read while an event-driven sensor reports motion, and reading
+        stops at the first polled sensor that reports it.
+        """
+        with self._lock:
+            if any(self._motion[sensor] for sensor in self.event_sensors):
+                return
+
+        for sensor in self.polled_sensors:
+            self.polls += 1
+            # a cached reading could hide motion that stopped since it was read
+            motion = self._read_cache.get_motion(sensor, max_age_seconds=0)
+            self.on_edge(sensor, motion)
+
+            if motion:
+                break
+
+    def on_edge(self, sensor, motion):
+        event_time = time.monotonic()
+
+        with self._lock:
+            if self._motion[sensor] == motion:
+                return
+
+            self._motion[sensor] = motion
+            if motion:
+                since_last_start = event_time - self._last_start[sensor]
+                self._last_start[sensor] = event_time
+
+                # keep the state but don't re-notify for a bouncing signal
+                if since_last_start < self._debounce_seconds:
+                    self.debounced += 1
+                    return
+            self.events += 1
+
+        self.log.debug(
+            "{}: motion {}".format(sensor.name, "started" if motion else "stopped")
+        )
+
+        event = MotionEvent(sensor, motion, event_time)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.log.error("Motion listener raised an exception")
+                self.log.exception(e)
+
+
+class SimulatedMotionSensor(MotionSensor):
+    """A motion sensor whose edges are driven by trigger() and clear(), e.g. for tests"""
+
+    def __init__(self, name="SimulatedMotionSensor", supports_events=True):
+        self._supports_events = supports_events
+        self._motion = False
+        self._motion_callbacks = []
+
+        super().__init__(name)
+
+    @property
+    def motion(self) -> bool:
+        return self._motion
+
+    @property
+    def supports_motion_events(self) -> bool:
+        return self._supports_events
+
+    def add_motion_callback(self, callback) -> None:
+        self._motion_callbacks.append(callback)
+
+    def trigger(self):
+        self._set_motion(True)
+
+    def clear(self):
+        self._set_motion(False)
+
+    def _set_motion(self, motion):
+        self._motion = motion
+        if not self._supports_events:
+            return
+
+        for callback in self._motion_callbacks:
+            callback(self, motion)
@@ -2,7 +2,9 @@ import math
 import time
 import logging
 import util.utils as utils
+from package.light.device_group.batch import LightCommandBatch, LightCommandQueue
 from package.light.device_group.device_group import DeviceGroupError
+from .motion_events import MotionEventSource
 
 
 class MotionLightsManager:
@@ -15,6 +17,8 @@ class MotionLightsManager:
         on_motion_trigger,
         on_motion_timeout,
         timeout_seconds=10,
+        debounce_seconds=1,
+        read_cache=None,
         debug=False,
     ):
         self.log = logging.getLogger(self.__class__.__name__)
@@ -26,7 +30,16 @@ class MotionLightsManager:
         self._motion_sensors = motion_sensors
         self._motion_timeout_seconds = timeout_seconds
 
+        # the hsbk last applied; commands and their retries run in the background
         self._current_hsbk = None
+        self._commands = LightCommandQueue(on_done=self.on_command_done)
+        self._edge_handler = None
+
+        # edge-capable sensors switch the lights on as soon as motion starts
+        self._motion_events = MotionEventSource(
+            motion_sensors, debounce_seconds=debounce_seconds, read_cache=read_cache
+        )
+        self._motion_events.subscribe(self.on_motion_event)
 
         self._on_motion_trigger_hsbk = utils.parse_hsbk_map(on_motion_trigger["hsbk"])
         self._on_motion_trigger_transition = utils.get_config_prop(
@@ -46,6 +59,12 @@ class MotionLightsManager:
         self.log.info("Initialized")
         self.log.debug(utils.repr_device_groups(device_groups))
         self.log.debug("Motion sensors: {}".format(utils.repr_sensors(motion_sensors)))
+        self.log.debug(
+            "Event-driven: {}, polled: {}".format(
+                utils.repr_sensors(self._motion_events.event_sensors),
+                utils.repr_sensors(self._motion_events.polled_sensors),
+            )
+        )
         self.log.debug(
             "Motion timeout: {} second(s)".format(self._motion_timeout_seconds)
         )
@@ -60,38 +79,94 @@ class MotionLightsManager:
             )
         )
 
+    @property
+    def device_groups(self) -> list:
+        return self._device_groups
+
+    @property
+    def motion_events(self) -> MotionEventSource:
+        return self._motion_events
+
     def is_motion_detected(self):
-        return any([sensor.motion for sensor in self._motion_sensors])
+        self._motion_events.poll()
+
+        return self._motion_events.motion
+
+    def set_edge_handler(self, handler):
+        """Has motion edges call handler() to request a run instead of switching the
+        lights on themselves, as edges arrive on the sensor's callback thread"""
+        self._edge_handler = handler
+
+    def on_motion_event(self, event):
+        if not event.motion:
+            return
+
+        self._detection_time = time.time()
+        if self._edge_handler is not None:
+            self._edge_handler()
+            self.log.debug(
+                "{} motion to run request in {:.1f} ms".format(
+                    event.sensor.name, event.age * 1000
+                )
+            )
+            return
+
+        self.on_motion_trigger(
+            self._on_motion_trigger_hsbk,
+            transition_seconds=self._on_motion_trigger_transition,
+        )
+        self.log.debug(
+            "{} motion to light command in {:.1f} ms".format(
+                event.sensor.name, event.age * 1000
+            )
+        )
 
     def on_motion(self, hsbk, transition_seconds=0):
+        batch = LightCommandBatch()
+        for group in self._device_groups:
+            batch.add(group, hsbk, transition_seconds)
+
+        # applied one at a time, so edge callbacks and the periodic run don't race
+        self._commands.submit(hsbk, batch.apply)
+
+    def on_command_done(self, hsbk, error):
+        if error is None:
+            self._current_hsbk = hsbk
+        elif isinstance(error, DeviceGroupError):
+            self.log.error(error)
+
+    def get_target_hsbk(self) -> dict:
+        """Returns the hsbk last requested, applied or not"""
+        pending_hsbk = self._commands.pending_key
+        if pending_hsbk is not None:
+            return pending_hsbk
+
+        return self._current_hsbk
+
+    def wait_for_lights(self, timeout=None) -> bool:
+        """Waits until the light commands requested so far have been applied or failed"""
+        return self._commands.wait(timeout)
+
+    def reconcile_device_groups(self):
         for group in self._device_groups:
-            group.set_hsbk(hsbk, transition_seconds)
+            try:
+                group.reconcile()
+            except DeviceGroupError as e:
+                self.log.error(e)
 
     def on_motion_trigger(self, hsbk, transition_seconds=0):
-        if self._current_hsbk == hsbk:
+        if self.get_target_hsbk() == hsbk:
             return
 
         self.log.info("motion triggered - activating light groups")
-        try:
-            self.on_motion(hsbk, transition_seconds=transition_seconds)
-            self._current_hsbk = hsbk
-        except DeviceGroupError as dge:
-            self.log.error(dge)
-        except Exception as e:
-            raise e
+        self.on_motion(hsbk, transition_seconds=transition_seconds)
 
     def on_motion_timeout(self, hsbk, transition_seconds=0):
-        if self._current_hsbk == hsbk:
+        if self.get_target_hsbk() == hsbk:
             return
 
         self.log.info("motion timeout - deactivating light groups")
-        try:
-            self.on_motion(hsbk, transition_seconds=transition_seconds)
-            self._current_hsbk = hsbk
-        except DeviceGroupError as dge:
-            self.log.error(dge)
-        except Exception as e:
-            raise e
+        self.on_motion(hsbk, transition_seconds=transition_seconds)
 
     def run(self):
         motion_detection = self.is_motion_detected()
@@ -111,3 +186,9 @@ class MotionLightsManager:
                     self._on_motion_timeout_hsbk,
                     transition_seconds=self._on_motion_timeout_transition,
                 )
+
+        self.reconcile_device_groups()
+
+    async def run_async(self):
+        # every step of a run blocks, so the whole run holds one executor thread
+        await utils.run_blocking(self.run)
@@ -1,87 +1,144 @@
 import logging
 import datetime
 import util.utils as utils
+from package.light.device_group.batch import LightCommandBatch, LightCommandQueue
 from package.light.device_group.device_group import DeviceGroupError
+from .timeline import ScheduleTimeline
+from .transition import TransitionEngine
 
 
 class ScheduleManager:
-    def __init__(self, device_groups, schedules, debug=False):
+    def __init__(self, device_groups, schedules, max_sleep_seconds=60, debug=False):
         self.log = logging.getLogger(self.__class__.__name__)
         self.debug = debug
 
         self._device_groups = device_groups
 
         self._schedules = schedules
+        # the schedule last applied; transitions and their retries run in the background
         self._active_schedule = None
+        self._commands = LightCommandQueue(on_done=self.on_command_done)
+        self._max_sleep_seconds = max_sleep_seconds
+        self._timeline = ScheduleTimeline(schedules)
+        self._transition_engine = TransitionEngine(self._timeline)
 
         self.log.info("Initialized")
         self.log.debug(utils.repr_device_groups(device_groups))
         self.log.debug(utils.repr_schedules(schedules))
 
-    def on_schedule_change(self, current_schedule):
-        hsbk = utils.parse_hsbk_map(current_schedule["hsbk"])
+    def run(self):
+        transition_state = self.get_transition_state()
+        if transition_state is None:
+            return
 
-        nowdate = datetime.datetime.now()
-        curr_schedule_dt = utils.hour_to_datetime(current_schedule["time"])
-        transition_seconds = (
-            utils.dehumanize(current_schedule["transition"])
-            if "transition" in current_schedule
-            else 0
-        )
-        schedule_transition_over_dt = curr_schedule_dt + datetime.timedelta(
-            seconds=transition_seconds
+        current_schedule = transition_state.entry.schedule
+        if self.get_target_schedule() != current_schedule:
+            self.log_schedule_change(current_schedule)
+            self._commands.submit(
+                current_schedule, self.apply_transition_state, transition_state
+            )
+
+        self.reconcile_device_groups()
+
+    async def run_async(self):
+        # every step of a run blocks, so the whole run holds one executor thread
+        await utils.run_blocking(self.run)
+
+    def apply_transition_state(self, transition_state):
+        if transition_state.in_progress and transition_state.progress > 0:
+            # joined part way through a ramp: jump to where it should be by now
+            self.log.info("Resuming transition {}".format(transition_state))
+            self.set_device_groups(transition_state.hsbk)
+
+        self.set_device_groups(
+            transition_state.target_hsbk, transition_state.remaining_seconds
         )
 
-        if nowdate >= schedule_transition_over_dt:
-            transition_seconds = 0
+    def on_command_done(self, schedule, error):
+        if error is None:
+            self._active_schedule = schedule
+        elif isinstance(error, DeviceGroupError):
+            self.log.error(error)
 
-        return hsbk, transition_seconds
+    def get_target_schedule(self):
+        """Returns the schedule last requested, applied or not"""
+        pending_schedule = self._commands.pending_key
+        if pending_schedule is not None:
+            return pending_schedule
 
-    def run(self):
-        current_schedule = self.get_current_schedule()
-        if current_schedule is None:
-            return
+        return self._active_schedule
 
-        hsbk, transition_seconds = self.on_schedule_change(current_schedule)
+    def wait_for_lights(self, timeout=None) -> bool:
+        """Waits until the schedules requested so far have been applied or failed"""
+        return self._commands.wait(timeout)
 
-        if transition_seconds is None:
-            transition_seconds = 0
+    def set_device_groups(self, hsbk, transition_seconds=0):
+        batch = LightCommandBatch()
+        for group in self._device_groups:
+            batch.add(group, hsbk, transition_seconds)
 
-        if self._active_schedule != current_schedule:
-            transition_msg = (
-                "Light schedule changed: {} -> {}".format(
-                    self._active_schedule["name"], current_schedule["name"]
-                )
-                if self._active_schedule is not None
-                else "New light schedule: {}".format(current_schedule["name"])
-            )
-            self.log.info(transition_msg)
+        batch.apply()
 
+    def reconcile_device_groups(self):
+        for group in self._device_groups:
             try:
-                for group in self._device_groups:
-                    group.set_hsbk(hsbk, transition_seconds)
-
-                self._active_schedule = current_schedule
+                group.reconcile()
             except DeviceGroupError as e:
                 self.log.error(e)
 
-    def get_current_schedule(self):
-        if len(self._schedules) == 0:
-            return None
+    def log_schedule_change(self, current_schedule):
+        transition_msg = (
+            "Light schedule changed: {} -> {}".format(
+                self._active_schedule["name"], current_schedule["name"]
+            )
+            if self._active_schedule is not None
+            else "New light schedule: {}".format(current_schedule["name"])
+        )
+        self.log.info(transition_msg)
+
+    @property
+    def device_groups(self) -> list:
+        return self._device_groups
+
+    @property
+    def max_sleep_seconds(self) -> float:
+        return self._max_sleep_seconds
 
+    def get_timeline(self) -> ScheduleTimeline:
         nowdate = datetime.datetime.now()
-        current_schedule = None
-
-        for _, schedule in enumerate(self._schedules):
-            schedule_dt = utils.hour_to_datetime(schedule["time"])
-            transition_seconds = (
-                utils.dehumanize(schedule["transition"])
-                if "transition" in schedule
-                else 0
+        if self._timeline.is_stale(nowdate):
+            self._timeline = ScheduleTimeline(self._schedules, nowdate.date())
+            self._transition_engine = TransitionEngine(self._timeline)
+            self.log.debug(
+                "Compiled schedule timeline: {}".format(self._timeline.entries)
             )
-            schedule_dt = schedule_dt - datetime.timedelta(seconds=transition_seconds)
 
-            if nowdate >= schedule_dt:
-                current_schedule = schedule
+        return self._timeline
+
+    def get_transition_state(self):
+        self.get_timeline()
+
+        return self._transition_engine.get_state(datetime.datetime.now())
+
+    def get_current_entry(self):
+        return self.get_timeline().get_active(datetime.datetime.now())
+
+    def get_current_schedule(self):
+        current_entry = self.get_current_entry()
+        if current_entry is None:
+            return None
+
+        return current_entry.schedule
+
+    def get_next_boundary(self):
+        return self.get_timeline().get_next_boundary(datetime.datetime.now())
+
+    def get_sleep_seconds(self) -> float:
+        """Returns the seconds until the next schedule boundary, at most max_sleep_seconds"""
+        next_boundary = self.get_next_boundary()
+        if next_boundary is None:
+            return self._max_sleep_seconds
+
+        seconds = (next_boundary - datetime.datetime.now()).total_seconds()
 
-        return current_schedule
+        return max(0, min(seconds, self._max_sleep_seconds))
@@ -0,0 +1,104 @@
+import bisect
+import datetime
+import util.utils as utils
+
+
+class ScheduleEntry:
+    __slots__ = (
+        "name",
+        "schedule",
+        "_hsbk",
+        "start",
+        "end",
+        "transition_seconds",
+        "previous",
+    )
+
+    def __init__(self, schedule, date):
+        self.name = schedule["name"]
+        self.schedule = schedule
+        self._hsbk = None
+        self.transition_seconds = (
+            utils.dehumanize(schedule["transition"]) if "transition" in schedule else 0
+        )
+
+        # the transition ramps up to the schedule's time, so it starts that much earlier
+        self.end = datetime.datetime.combine(
+            date, datetime.datetime.strptime(schedule["time"], "%H:%M").time()
+        )
+        self.start = self.end - datetime.timedelta(seconds=self.transition_seconds)
+        # the entry this one transitions from
+        self.previous = None
+
+    @property
+    def hsbk(self) -> dict:
+        # parsed on first use so an invalid hsbk only fails the entry that uses it
+        if self._hsbk is None:
+            self._hsbk = utils.parse_hsbk_map(self.schedule["hsbk"])
+
+        return self._hsbk
+
+    def __repr__(self):
+        return "{} ({} -> {})".format(
+            self.name, self.start.strftime("%H:%M:%S"), self.end.strftime("%H:%M:%S")
+        )
+
+
+class ScheduleTimeline:
+    """A day's schedules compiled into entries sorted by the instant their transition starts.
+
+    Lookups bisect the start instants, so finding the active entry or the next
+    boundary doesn't re-parse any schedule. Entries of the next day whose
+    transition starts before midnight, e.g. a 00:10 schedule with a 30m transition,
+    are included so their ramp starts on time. Compile a new timeline when the day
+    rolls over.
+    """
+
+    def __init__(self, schedules, date=None):
+        self.date = date if date is not None else datetime.date.today()
+
+        midnight = datetime.datetime.combine(
+            self.date, datetime.time()
+        ) + datetime.timedelta(days=1)
+
+        entries = [ScheduleEntry(schedule, self.date) for schedule in schedules]
+        # stable, so of entries starting together the last configured one wins
+        entries = sorted(entries, key=lambda entry: entry.start)
+        # the first entry of the day transitions from the last one of the day before
+        for index, entry in enumerate(entries):
+            entry.previous = entries[index - 1]
+
+        for entry in list(entries):
+            next_entry = ScheduleEntry(entry.schedule, midnight.date())
+            if next_entry.start < midnight:
+                next_entry.previous = entry.previous
+                entries.append(next_entry)
+
+        self.entries = sorted(entries, key=lambda entry: entry.start)
+        self._starts = [entry.start for entry in self.entries]
+
+        boundaries = set()
+        for entry in self.entries:
+            boundaries.add(entry.start)
+            boundaries.add(entry.end)
+        boundaries.add(midnight)
+        self._boundaries = sorted(boundaries)
+
+    def is_stale(self, nowdate) -> bool:
+        return nowdate.date() != self.date
+
+    def get_active(self, nowdate) -> ScheduleEntry:
+        """Returns the entry whose transition most recently started at nowdate, or None"""
+        index = bisect.bisect_right(self._starts, nowdate)
+        if index == 0:
+            return None
+
+        return self.entries[index - 1]
+
+    def get_next_boundary(self, nowdate) -> datetime.datetime:
+        """Returns the next instant a transition starts or ends, or the next midnight"""
+        index = bisect.bisect_right(self._boundaries, nowdate)
+        if index == len(self._boundaries):
+            return None
+
+        return self._boundaries[index]
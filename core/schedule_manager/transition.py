@@ -0,0 +1,86 @@
+import util.utils as utils
+
+
+class TransitionState:
+    __slots__ = ("entry", "hsbk", "target_hsbk", "progress", "remaining_seconds")
+
+    def __init__(self, entry, hsbk, target_hsbk, progress, remaining_seconds):
+        self.entry = entry
+        self.hsbk = hsbk
+        self.target_hsbk = target_hsbk
+        self.progress = progress
+        self.remaining_seconds = remaining_seconds
+
+    @property
+    def in_progress(self) -> bool:
+        return self.remaining_seconds > 0
+
+    def __repr__(self):
+        return "{} at {:.0%}: {} -> {} over {}s".format(
+            self.entry.name,
+            self.progress,
+            self.hsbk,
+            self.target_hsbk,
+            round(self.remaining_seconds),
+        )
+
+
+class TransitionEngine:
+    """Computes the HSBK a schedule timeline calls for at any instant.
+
+    Each entry ramps linearly from the previous entry's HSBK to its own between its
+    transition start and end, so a ramp joined part way through can be resumed from
+    the exact interpolated colour with the remaining duration.
+    """
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+
+    def get_state(self, nowdate) -> TransitionState:
+        entry = self.timeline.get_active(nowdate)
+        if entry is None:
+            if len(self.timeline.entries) == 0:
+                return None
+
+            # before the day's first transition the last one of the day before holds
+            entry = self.timeline.entries[0].previous
+            return TransitionState(entry, entry.hsbk, entry.hsbk, 1, 0)
+
+        # whole seconds, as device transitions are given in seconds
+        remaining_seconds = max(0, round((entry.end - nowdate).total_seconds()))
+        if remaining_seconds == 0 or entry.transition_seconds == 0:
+            return TransitionState(entry, entry.hsbk, entry.hsbk, 1, 0)
+
+        progress = 1 - remaining_seconds / entry.transition_seconds
+        hsbk = self.interpolate(entry.previous.hsbk, entry.hsbk, progress)
+
+        return TransitionState(entry, hsbk, entry.hsbk, progress, remaining_seconds)
+
+    @staticmethod
+    def interpolate(from_hsbk, to_hsbk, progress) -> dict:
+        """Returns the HSBK progress (0-1) of the way from from_hsbk to to_hsbk.
+
+        Fields missing from from_hsbk take their to_hsbk value right away.
+        """
+        hsbk = {}
+
+        for field, to_value in to_hsbk.items():
+            if field not in from_hsbk:
+                hsbk[field] = to_value
+                continue
+
+            from_value = from_hsbk[field]
+            delta = to_value - from_value
+            if field == "hue":
+                # take the shorter way round the colour wheel
+                delta = (delta + 180) % utils.HSBK_HUE_MAX_VALUE - 180
+                value = (from_value + delta * progress) % utils.HSBK_HUE_MAX_VALUE
+                hsbk[field] = round(value)
+            elif field == "kelvin":
+                hsbk[field] = round(from_value + delta * progress)
+            else:
+                hsbk[field] = round(
+                    from_value + delta * progress, utils.HSBK_FLT_PRECISION
+                )
+
+        return hsbk
@@ -0,0 +1,140 @@
+import logging
+import schedule
+import datetime
+import threading
+
+
+class JobLateness:
+    def __init__(self):
+        self.count = 0
+        self.last = 0
+        self.max = 0
+        self.total = 0
+
+    def record(self, lateness_seconds):
+        self.count += 1
+        self.last = lateness_seconds
+        self.max = max(self.max, lateness_seconds)
+        self.total += lateness_seconds
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "last": round(self.last, 3),
+            "max": round(self.max, 3),
+            "avg": round(self.total / self.count, 3) if self.count > 0 else 0,
+        }
+
+
+class Scheduler:
+    """Sleeps until the next job is due instead of polling every second.
+
+    The loop wakes early when a job is added, and trigger(name) runs a job right
+    away in response to an event, e.g. a motion edge. A job can move its own next
+    run with reschedule(name, delay_seconds), e.g. to the next instant it has work
+    to do.
+    """
+
+    def __init__(self):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._scheduler = schedule.Scheduler()
+        self._funcs = dict()
+        self._lateness = dict()
+        self._triggered = []
+        self._rescheduled = dict()
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def every(self, interval_seconds, name, func, *args):
+        if name in self._funcs:
+            raise ValueError("A job named {} is already scheduled".format(name))
+
+        self._funcs[name] = (func, args)
+        self._lateness[name] = JobLateness()
+        job = self._scheduler.every(interval_seconds).seconds.do(func, *args).tag(name)
+
+        self._wake()
+
+        return job
+
+    def trigger(self, name):
+        """Runs job name on the next pass of the loop; safe to call from any thread"""
+        if name not in self._funcs:
+            raise ValueError("No job named {} is scheduled".format(name))
+
+        with self._lock:
+            self._triggered.append(name)
+
+        self._wake()
+
+    def reschedule(self, name, delay_seconds):
+        with self._lock:
+            self._rescheduled[name] = datetime.datetime.now() + datetime.timedelta(
+                seconds=delay_seconds
+            )
+
+        self._wake()
+
+    def _wake(self):
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake()
+
+    def get_lateness(self) -> dict:
+        return {name: lateness.stats for name, lateness in self._lateness.items()}
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=self._idle_seconds())
+            self._wakeup.clear()
+
+            if self._stopped.is_set():
+                break
+
+            self._run_triggered()
+            self._run_pending()
+            self._apply_rescheduled()
+
+    def _idle_seconds(self):
+        idle_seconds = self._scheduler.idle_seconds
+        if idle_seconds is None:
+            return None
+
+        return max(0, idle_seconds)
+
+    def _run_triggered(self):
+        with self._lock:
+            triggered = self._triggered
+            self._triggered = []
+
+        for name in triggered:
+            func, args = self._funcs[name]
+            self.log.debug("Running triggered job {}".format(name))
+            func(*args)
+
+    def _apply_rescheduled(self):
+        # applied from the loop, after run_pending has set the jobs' regular next run
+        with self._lock:
+            for job in self._scheduler.jobs:
+                for name in job.tags:
+                    if name in self._rescheduled:
+                        job.next_run = self._rescheduled.pop(name)
+
+    def _run_pending(self):
+        nowdate = datetime.datetime.now()
+
+        for job in self._scheduler.jobs:
+            if not job.should_run:
+                continue
+
+            lateness_seconds = (nowdate - job.next_run).total_seconds()
+            for name in job.tags:
+                self._lateness[name].record(lateness_seconds)
+
+        self._scheduler.run_pending()
@@ -0,0 +1,108 @@
+import time
+import logging
+import threading
+
+
+class SensorReadStats:
+    def __init__(self):
+        self.hits = 0
+        self.reads = 0
+        self.last_latency = 0
+        self.total_latency = 0
+
+    def record_read(self, latency_seconds):
+        self.reads += 1
+        self.last_latency = latency_seconds
+        self.total_latency += latency_seconds
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.reads
+
+        return {
+            "hits": self.hits,
+            "reads": self.reads,
+            "hit_rate": round(self.hits / lookups, 3) if lookups > 0 else 0,
+            "last_latency_ms": round(self.last_latency * 1000, 3),
+            "avg_latency_ms": (
+                round(self.total_latency / self.reads * 1000, 3)
+                if self.reads > 0
+                else 0
+            ),
+        }
+
+
+class SensorReadCache:
+    """Shares each sensor's last reading between managers for its freshness window.
+
+    A lookup within sensor.freshness_seconds of the last read returns that reading
+    instead of reading the hardware again. Concurrent lookups of the same sensor
+    wait for the one read in progress rather than starting their own.
+    """
+
+    def __init__(self):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._lock = threading.Lock()
+        self._sensor_locks = dict()
+        self._readings = dict()
+        self._stats = dict()
+
+    def get_data(self, sensor, max_age_seconds=None) -> dict:
+        """Returns sensor.data, read from the hardware only if the last reading is stale.
+
+        max_age_seconds shortens the sensor's freshness window, e.g. 0 for a state
+        that can change at any moment. A read that finished while this call
+        waited for it still counts as fresh.
+        """
+        request_time = time.monotonic()
+        freshness_seconds = sensor.freshness_seconds
+        if max_age_seconds is not None:
+            freshness_seconds = min(freshness_seconds, max_age_seconds)
+
+        with self._get_sensor_lock(sensor):
+            stats = self._stats[sensor]
+            reading = self._readings.get(sensor)
+            nowtime = time.monotonic()
+
+            fresh = reading is not None and (
+                reading[0] >= request_time or nowtime - reading[0] < freshness_seconds
+            )
+            if fresh:
+                stats.hits += 1
+                return reading[1]
+
+            data = sensor.data
+            read_time = time.monotonic()
+            stats.record_read(read_time - nowtime)
+            self._readings[sensor] = (read_time, data)
+
+            return data
+
+    def get_motion(self, sensor, max_age_seconds=None) -> bool:
+        value = self.get_data(sensor, max_age_seconds).get("value")
+        if isinstance(value, dict):
+            return bool(value.get("motion"))
+
+        return bool(value)
+
+    def any_motion(self, sensors, max_age_seconds=None) -> bool:
+        """Returns True as soon as one sensor reports motion, leaving the rest unread"""
+        for sensor in sensors:
+            if self.get_motion(sensor, max_age_seconds):
+                return True
+
+        return False
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {sensor.name: stats.stats for sensor, stats in self._stats.items()}
+
+    def _get_sensor_lock(self, sensor):
+        with self._lock:
+            if sensor not in self._sensor_locks:
+                self._sensor_locks[sensor] = threading.Lock()
+                self._stats[sensor] = SensorReadStats()
+
+            return self._sensor_locks[sensor]
@@ -0,0 +1,53 @@
+import sys
+
+
+class SampleKey:
+    """A sensor's id, name and value type, created once and shared by its samples"""
+
+    __slots__ = ("id", "name", "type")
+
+    def __init__(self, id, name, type):
+        self.id = sys.intern(str(id))
+        self.name = sys.intern(str(name))
+        self.type = sys.intern(str(type))
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return "SampleKey({}, {}, {})".format(self.id, self.name, self.type)
+
+
+class Sample:
+    """One value read from a sensor, on its way to the database"""
+
+    __slots__ = ("key", "value", "time")
+
+    def __init__(self, key, value, time):
+        self.key = key
+        self.value = value
+        self.time = time
+
+    @staticmethod
+    def from_dict(data):
+        return Sample(
+            SampleKey(data["id"], data["name"], data["type"]),
+            data["value"],
+            data["time"],
+        )
+
+    @staticmethod
+    def from_dicts(data) -> list:
+        """Converts any dicts in data, e.g. from older callers, leaving samples as they are"""
+        return [
+            Sample.from_dict(entry) if isinstance(entry, dict) else entry
+            for entry in data
+        ]
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return "Sample({}, {}, {}, {})".format(
+            self.key.name, self.key.type, self.value, self.time
+        )
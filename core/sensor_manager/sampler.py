@@ -0,0 +1,136 @@
+import time
+import logging
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class SensorRead:
+    def __init__(self, sensor, group_size):
+        self.sensor = sensor
+        self.group_size = group_size
+        self.start_time = None
+        self.future = None
+
+    def expiry(self, batch_start, deadline_seconds) -> float:
+        # a read's own deadline starts once it holds its bus; until then it may
+        # queue behind every other sensor sharing that bus
+        if self.start_time is None:
+            return batch_start + deadline_seconds * self.group_size
+
+        return self.start_time + deadline_seconds
+
+
+class SensorSampler:
+    """Reads sensors concurrently on a bounded worker pool.
+
+    Sensors that report the same bus are read one at a time so they don't contend.
+    A sensor that has not answered within its deadline is reported as missing; its
+    worker can't be interrupted, so the sensor is skipped until that read returns.
+    Given a read cache, readings still fresh from another manager are reused.
+    """
+
+    def __init__(self, max_workers=4, deadline_seconds=10, read_cache=None):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._deadline_seconds = deadline_seconds
+        self._read_cache = read_cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="SensorSampler"
+        )
+
+        self._lock = threading.Lock()
+        self._bus_locks = dict()
+        self._in_flight = set()
+
+    def sample(self, sensors) -> tuple[list, list]:
+        """Returns (readings, missing) with a (sensor, sensor.data) for each sensor read in time."""
+        batch_start = time.monotonic()
+        missing = []
+        reads = []
+
+        group_sizes = dict()
+        for sensor in sensors:
+            group_sizes[sensor.bus] = group_sizes.get(sensor.bus, 0) + 1
+
+        for sensor in sensors:
+            with self._lock:
+                if sensor in self._in_flight:
+                    self.log.warning(
+                        "{} still busy with a previous read, skipping".format(sensor)
+                    )
+                    missing.append(sensor)
+                    continue
+                self._in_flight.add(sensor)
+
+            group_size = group_sizes[sensor.bus] if sensor.bus is not None else 1
+            read = SensorRead(sensor, group_size)
+            read.future = self._executor.submit(self._read, read)
+            reads.append(read)
+
+        pending = {read.future: read for read in reads}
+        while len(pending) > 0:
+            nowtime = time.monotonic()
+            expired = [
+                read
+                for read in pending.values()
+                if read.expiry(batch_start, self._deadline_seconds) <= nowtime
+            ]
+            for read in expired:
+                self.log.warning(
+                    "{} missed its {} second deadline".format(
+                        read.sensor, self._deadline_seconds
+                    )
+                )
+                missing.append(read.sensor)
+                del pending[read.future]
+
+            if len(pending) == 0:
+                break
+
+            next_expiry = min(
+                read.expiry(batch_start, self._deadline_seconds)
+                for read in pending.values()
+            )
+            done, _ = wait(
+                pending.keys(),
+                timeout=max(0, next_expiry - nowtime),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                del pending[future]
+
+        readings = [
+            (read.sensor, read.future.result())
+            for read in reads
+            if read.future.done() and read.sensor not in missing
+        ]
+
+        return readings, missing
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _read(self, read):
+        sensor = read.sensor
+
+        try:
+            with self._get_bus_lock(sensor.bus):
+                read.start_time = time.monotonic()
+                if self._read_cache is not None:
+                    return self._read_cache.get_data(sensor)
+
+                return sensor.data
+        finally:
+            with self._lock:
+                self._in_flight.discard(sensor)
+
+    def _get_bus_lock(self, bus):
+        if bus is None:
+            return contextlib.nullcontext()
+
+        with self._lock:
+            if bus not in self._bus_locks:
+                self._bus_locks[bus] = threading.Lock()
+
+            return self._bus_locks[bus]
@@ -1,6 +1,7 @@
 import time
 import logging
 import uuid
+from .sample import Sample, SampleKey
 
 
 class Sensor:
@@ -10,6 +11,9 @@ class Sensor:
         self._type = type
 
         self._data = dict()
+        # samples of a composite sensor get a key per type in its value dict
+        self._sample_key = SampleKey(self.id, name, type)
+        self._sample_keys = dict()
         self.log = logging.getLogger(str(self.name))
 
     def get_data(self) -> dict:
@@ -23,12 +27,22 @@ class Sensor:
     def type(self):
         return self._type
 
+    @property
+    def freshness_seconds(self):
+        """Returns how long a reading stays fresh enough to be shared between managers"""
+        return 1
+
+    @property
+    def bus(self):
+        """Returns the name of the bus shared with other sensors, or None if independent"""
+        return None
+
     @property
     def data(self):
         try:
             data = dict()
             value = self.get_data()
-            data["id"] = str(self.id)
+            data["id"] = self._sample_key.id
             data["name"] = self.name
             data["value"] = value
             data["type"] = self.type
@@ -41,6 +55,26 @@ class Sensor:
 
         return self._data
 
+    def get_samples(self, data) -> list[Sample]:
+        """Returns a sample per value in data, as returned by data"""
+        if "value" not in data:
+            return []
+
+        value = data["value"]
+        if not isinstance(value, dict):
+            return [Sample(self._sample_key, value, data["time"])]
+
+        samples = []
+        for valuetype, typevalue in value.items():
+            key = self._sample_keys.get(valuetype)
+            if key is None:
+                key = SampleKey(self._sample_key.id, self.name, valuetype)
+                self._sample_keys[valuetype] = key
+
+            samples.append(Sample(key, typevalue, data["time"]))
+
+        return samples
+
     def __repr__(self):
         return self.__str__()
 
@@ -1,41 +1,82 @@
 import logging
+import util.utils as utils
 from .sensor import Sensor
+from .sampler import SensorSampler
 from package.sensor.environment.environment import *
 from package.sensor.device.device import DeviceSensor
 from package.sensor.hygrometer.hygrometer import Hygrometer
 
 
 class SensorManager:
-    def __init__(self, sensors, database_manager):
+    def __init__(
+        self,
+        sensors,
+        database_manager,
+        max_workers=4,
+        deadline_seconds=10,
+        read_cache=None,
+        ingestion_queue=None,
+    ):
         self.log = logging.getLogger(self.__class__.__name__)
         self._sensors = sensors
         self._db = database_manager
+        self._ingestion_queue = ingestion_queue
+
+        self._sampler = SensorSampler(
+            max_workers, deadline_seconds, read_cache=read_cache
+        )
+        self._missing_sensors = []
 
         self.log.info("Initialized")
         self.log.debug(self.sensors)
+        self.log.debug(
+            "Sampling with {} worker(s), {} second deadline".format(
+                max_workers, deadline_seconds
+            )
+        )
 
     @property
     def sensors(self) -> list[Sensor]:
         return self._sensors
 
+    @property
+    def missing_sensors(self) -> list[Sensor]:
+        """Returns the sensors that missed their deadline in the last run"""
+        return self._missing_sensors
+
     def run(self):
-        sensors_data = []
+        sensors_data = self._sample()
 
-        for sensor in self.sensors:
-            data = sensor.data
-            dataval = data["value"]
-            if isinstance(dataval, dict):
-                for valuetype, value in dataval.items():
-                    extradata = data.copy()
-                    extradata["type"] = valuetype
-                    extradata["value"] = value
-
-                    sensors_data.append(extradata)
-            else:
-                sensors_data.append(data)
+        self._store(sensors_data)
+
+    async def run_async(self):
+        # sampling and storing both block, so the whole run holds one executor thread
+        await utils.run_blocking(self.run)
+
+    def _store(self, sensors_data):
+        # with an ingestion queue the writer thread waits on the disk instead
+        if self._ingestion_queue is not None:
+            self._ingestion_queue.put(sensors_data)
+            return
 
         self._db.insert_sensors(sensors_data)
 
+    def _sample(self):
+        sensors_data = []
+
+        readings, self._missing_sensors = self._sampler.sample(self.sensors)
+        if len(self._missing_sensors) > 0:
+            self.log.warning(
+                "Missing data from {} sensor(s): {}".format(
+                    len(self._missing_sensors), self._missing_sensors
+                )
+            )
+
+        for sensor, data in readings:
+            sensors_data.extend(sensor.get_samples(data))
+
+        return sensors_data
+
     def get_hygrometers(self) -> list[Sensor]:
         return self._get_sensors_by_class(Hygrometer)
 
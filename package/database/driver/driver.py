@@ -1,4 +1,5 @@
 import logging
+from .query import Query
 
 
 class DatabaseDriver:
@@ -16,6 +17,18 @@ class DatabaseDriver:
         raise NotImplementedError()
 
     def select(self, table_name, cols, where=[], order_by=[], limit=None):
+        """Returns rows as dicts; where is a list of predicates without parameters"""
+        query = Query(table_name, cols)
+        for clause in where:
+            query.where(clause)
+        query.order_by(*order_by)
+        if limit is not None and limit != 0:
+            query.limit(limit)
+
+        return self.query(query)
+
+    def query(self, query: Query) -> list[dict]:
+        """Runs a Query and returns its rows as dicts"""
         raise NotImplementedError()
 
     def insert_row(self, table_name, row):
@@ -24,6 +37,39 @@ class DatabaseDriver:
     def insert_rows(self, table_name, rows):
         raise NotImplementedError()
 
+    def execute(self, query, params=()):
+        raise NotImplementedError()
+
+    def executemany(self, query, rows):
+        raise NotImplementedError()
+
+    def executemany_batch(self, batches):
+        """Runs each (query, rows) of batches with executemany in one transaction"""
+        raise NotImplementedError()
+
+    def stream(self, query, params=(), batch_size=1024):
+        """Yields the rows of a query in lists of up to batch_size, straight from the cursor"""
+        raise NotImplementedError()
+
+    def execute_update(self, query, params=()) -> int:
+        """Runs a write statement and returns the number of rows it changed"""
+        raise NotImplementedError()
+
+    def reclaim_space(self, max_pages) -> int:
+        """Returns up to max_pages free pages to the filesystem; returns the pages freed"""
+        raise NotImplementedError()
+
+    def get_schema_version(self) -> int:
+        raise NotImplementedError()
+
+    def migrate(self, version, statements, transaction=True):
+        """Runs statements and records version as the schema version.
+
+        Within a transaction it's all or nothing; without one, for statements such
+        as VACUUM, they must be safe to run again.
+        """
+        raise NotImplementedError()
+
     def __del__(self):
         # no guarantee this closes the connection but it doesn't matter too much
         self.close()
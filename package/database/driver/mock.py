@@ -4,6 +4,7 @@ from .driver import DatabaseDriver
 class MockDatabaseDriver(DatabaseDriver):
     def __init__(self, **kwargs):
         self.data = {}
+        self.schema_version = 0
         super().__init__()
 
     def connect(self):
@@ -16,20 +17,47 @@ class MockDatabaseDriver(DatabaseDriver):
         self.data[table_name] = []
 
     def select(self, table_name, cols, where=[], order_by=[], limit=[]):
-        return self.data[table_name]
+        return self.data.get(table_name, [])
+
+    def query(self, query):
+        return self.data.get(query.table_name, [])
 
     def insert_row(self, table_name, row):
         self.data[table_name] = row
 
     def insert_rows(self, table_name, rows):
         new_rows = []
-        existing_rows = self.data[table_name]
+        existing_rows = self.data.get(table_name, [])
 
         new_rows = existing_rows
         for row in rows:
             new_rows.append(row)
         self.data[table_name] = new_rows
 
+    def execute(self, query, params=()):
+        return []
+
+    def executemany(self, query, rows):
+        pass
+
+    def executemany_batch(self, batches):
+        pass
+
+    def stream(self, query, params=(), batch_size=1024):
+        yield from ()
+
+    def execute_update(self, query, params=()) -> int:
+        return 0
+
+    def reclaim_space(self, max_pages) -> int:
+        return 0
+
+    def get_schema_version(self) -> int:
+        return self.schema_version
+
+    def migrate(self, version, statements, transaction=True):
+        self.schema_version = version
+
     def __del__(self):
         # no guarantee this closes the connection but it doesn't matter too much
         self.close()
@@ -0,0 +1,110 @@
+import re
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+ORDER_TERM = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)(?: (ASC|DESC))?$", re.IGNORECASE)
+
+
+class Query:
+    """Builds a SELECT whose values are all bound as parameters.
+
+    Table and column names are checked to be plain identifiers, as they're the
+    only parts formatted into the statement. build() returns (sql, params).
+    """
+
+    def __init__(self, table_name: str, cols: list[str] = []):
+        self._table_name = self._identifier(table_name)
+        self._cols = [self._identifier(col) for col in cols]
+        self._where = []
+        self._params = []
+        self._order_by = []
+        self._limit = None
+
+    @property
+    def table_name(self) -> str:
+        return self._table_name
+
+    def where(self, clause: str, *params) -> "Query":
+        """Adds a predicate using ? placeholders for each of params"""
+        if clause.count("?") != len(params):
+            raise ValueError(
+                "{} expects {} parameters, got {}".format(
+                    clause, clause.count("?"), len(params)
+                )
+            )
+
+        self._where.append(clause)
+        self._params.extend(params)
+
+        return self
+
+    def where_in(self, col: str, values) -> "Query":
+        values = list(values)
+        if len(values) == 0:
+            # an empty IN list matches nothing
+            return self.where("0")
+
+        return self.where(
+            "{} IN ({})".format(self._identifier(col), ",".join(["?"] * len(values))),
+            *values
+        )
+
+    def where_range(
+        self,
+        col: str,
+        lower=None,
+        upper=None,
+        lower_inclusive: bool = True,
+        upper_inclusive: bool = False,
+    ) -> "Query":
+        """Adds lower <= col < upper, with either bound optional"""
+        col = self._identifier(col)
+        if lower is not None:
+            self.where("{} {} ?".format(col, ">=" if lower_inclusive else ">"), lower)
+        if upper is not None:
+            self.where("{} {} ?".format(col, "<=" if upper_inclusive else "<"), upper)
+
+        return self
+
+    def order_by(self, *terms: str) -> "Query":
+        for term in terms:
+            if ORDER_TERM.match(term) is None:
+                raise ValueError("Not a valid ORDER BY term: {}".format(term))
+
+            self._order_by.append(term)
+
+        return self
+
+    def limit(self, limit: int) -> "Query":
+        self._limit = None if limit is None else int(limit)
+
+        return self
+
+    def build(self) -> tuple[str, tuple]:
+        query = "SELECT {} FROM {}".format(
+            ", ".join(self._cols) if len(self._cols) > 0 else "*", self._table_name
+        )
+        params = list(self._params)
+
+        if len(self._where) > 0:
+            query += " WHERE " + " AND ".join(self._where)
+        if len(self._order_by) > 0:
+            query += " ORDER BY " + ", ".join(self._order_by)
+        if self._limit is not None:
+            query += " LIMIT ?"
+            params.append(self._limit)
+
+        return query, tuple(params)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        query, params = self.build()
+        return "{} {}".format(query, params)
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        if IDENTIFIER.match(name) is None:
+            raise ValueError("Not a valid identifier: {}".format(name))
+
+        return name
@@ -1,16 +1,50 @@
+import logging
 import sqlite3
+import threading
 from ..driver import DatabaseDriver
 
 
 class SQLiteDriver(DatabaseDriver):
-    def __init__(self, dbdata_path):
+    """Keeps one connection open and binds every value as a statement parameter.
+
+    Statement texts only depend on the table and column count, so sqlite3's
+    statement cache re-uses each prepared statement instead of re-parsing it.
+    File databases use WAL journaling with synchronous=NORMAL, which only syncs at
+    checkpoints; a power cut may lose the last commits but not corrupt the file.
+    """
+
+    def __init__(
+        self,
+        dbdata_path,
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size_kb=2048,
+        statement_cache_size=128,
+    ):
         self._conn = None
         self._dbdata_path = dbdata_path
+        self._journal_mode = journal_mode
+        self._synchronous = synchronous
+        self._cache_size_kb = cache_size_kb
+        self._statement_cache_size = statement_cache_size
+        self._lock = threading.RLock()
 
         super().__init__()
 
     def connect(self):
-        self._conn = sqlite3.connect(self._dbdata_path, check_same_thread=False)
+        self._conn = sqlite3.connect(
+            self._dbdata_path,
+            check_same_thread=False,
+            cached_statements=self._statement_cache_size,
+        )
+
+        with self._lock:
+            if self._dbdata_path != ":memory:":
+                self._pragma("journal_mode", self._journal_mode)
+            self._pragma("synchronous", self._synchronous)
+            # a negative cache_size is in KiB rather than pages
+            self._pragma("cache_size", -self._cache_size_kb)
+            self._pragma("temp_store", "MEMORY")
 
     def close(self):
         if self._conn is not None:
@@ -29,77 +63,137 @@ class SQLiteDriver(DatabaseDriver):
         query = "CREATE TABLE {} {}".format(table_name, formatted_cols)
         self.log.debug(query)
 
-        with self._conn as db:
+        with self._lock, self._conn as db:
             db.execute(query)
 
-    def select(self, table_name, cols=[], where=[], order_by=[], limit=None):
-        formatted_cols = "*"
-        if len(cols) > 0:
-            formatted_cols = ",".join(cols)
-
-        formatted_where = ""
-        if len(where) > 0:
-            formatted_where = "WHERE " + " AND ".join(where)
-
-        formatted_order_by = ""
-        if len(order_by) > 0:
-            formatted_order_by = "ORDER BY " + ",".join(order_by)
-
-        formatted_limit = ""
-        if limit is not None or limit != 0:
-            formatted_limit = "LIMIT {}".format(limit)
-
-        query = "SELECT {} FROM {} {} {} {}".format(
-            formatted_cols,
-            table_name,
-            formatted_where,
-            formatted_order_by,
-            formatted_limit,
-        )
-        self.log.debug(query)
+    def query(self, query) -> list[dict]:
+        sql, params = query.build()
+        self._log_query(sql, params)
 
         results = []
-        with self._conn as db:
-            cur = db.execute(query)
+        with self._lock, self._conn as db:
+            cur = db.execute(sql, params)
             col_names = [tup[0] for tup in cur.description]
             for row in cur:
-                result = dict()
-                idx = 0
-                for val in row:
-                    result[col_names[idx]] = val
-                    idx += 1
-
-                results.append(result)
+                results.append(dict(zip(col_names, row)))
 
         return results
 
     def insert_row(self, table_name, row):
-        formatted_row = self._format_values(row)
-        query = "INSERT INTO {} VALUES {}".format(table_name, formatted_row)
-        self.log.debug(query)
-
-        with self._conn as db:
-            db.execute(query)
+        self.insert_rows(table_name, [row])
 
     def insert_rows(self, table_name, rows):
-        formatted_rows = ",".join([self._format_values(row) for row in rows])
-        query = "INSERT INTO {} VALUES {}".format(table_name, formatted_rows)
+        if len(rows) == 0:
+            return
+
+        query = "INSERT INTO {} VALUES ({})".format(
+            table_name, ",".join(["?"] * len(rows[0]))
+        )
+        self.log.debug("{} x {}".format(query, len(rows)))
+
+        with self._lock, self._conn as db:
+            db.executemany(query, rows)
+
+    def execute(self, query, params=()) -> list:
+        self._log_query(query, params)
+
+        with self._lock, self._conn as db:
+            return db.execute(query, params).fetchall()
+
+    def executemany(self, query, rows):
+        self.log.debug("{} x {}".format(query, len(rows)))
+
+        with self._lock, self._conn as db:
+            db.executemany(query, rows)
+
+    def executemany_batch(self, batches):
+        with self._lock, self._conn as db:
+            for query, rows in batches:
+                self.log.debug("{} x {}".format(query, len(rows)))
+                db.executemany(query, rows)
+
+    def stream(self, query, params=(), batch_size=1024):
+        self._log_query(query, params)
+
+        # holds the lock until the generator is exhausted or closed
+        with self._lock:
+            cur = self._conn.execute(query, params)
+            try:
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if len(rows) == 0:
+                        return
+
+                    yield rows
+            finally:
+                cur.close()
+
+    def execute_update(self, query, params=()) -> int:
         self.log.debug(query)
 
-        with self._conn as db:
-            db.execute(query)
+        with self._lock, self._conn as db:
+            return db.execute(query, params).rowcount
+
+    def reclaim_space(self, max_pages) -> int:
+        with self._lock:
+            freelist_count = self._pragma("freelist_count")[0]
+            # execute() only steps the pragma once, freeing a single page;
+            # executescript() runs it to completion. It does nothing unless
+            # auto_vacuum is INCREMENTAL, which a schema migration sets.
+            self._conn.executescript(
+                "PRAGMA incremental_vacuum({});".format(int(max_pages))
+            )
+
+            return freelist_count - self._pragma("freelist_count")[0]
+
+    def get_schema_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self, version, statements, transaction=True):
+        with self._lock:
+            if not transaction:
+                # e.g. VACUUM, which can't run in a transaction; these statements
+                # must be safe to run again if the version isn't recorded
+                for statement in statements:
+                    self.log.debug(statement)
+                    self._conn.execute(statement)
+                self._conn.execute("PRAGMA user_version = {}".format(int(version)))
+                return
+
+            # sqlite3 doesn't open a transaction for DDL by itself
+            self._conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    self.log.debug(statement)
+                    self._conn.execute(statement)
+                self._conn.execute("PRAGMA user_version = {}".format(int(version)))
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                raise e
 
     def _check_connection(self):
         return self._conn is not None
 
-    def _format_values(self, values):
-        parsed_values = []
-        for value in values:
-            if isinstance(value, str):
-                value = "'{}'".format(value)
+    def _log_query(self, query, params):
+        if not self.log.isEnabledFor(logging.DEBUG):
+            return
 
-            parsed_values.append(value)
+        self.log.debug("{} {}".format(query, tuple(params)))
+        if not query.lstrip().upper().startswith("SELECT"):
+            return
 
-        formatted_values = "(" + ",".join(map(str, parsed_values)) + ")"
+        # shows whether a query searches an index or scans a whole table
+        with self._lock:
+            plan = self._conn.execute("EXPLAIN QUERY PLAN " + query, params)
+            for _, _, _, detail in plan.fetchall():
+                self.log.debug("  plan: {}".format(detail))
+
+    def _pragma(self, name, value=None):
+        query = "PRAGMA {}".format(name)
+        if value is not None:
+            query = "PRAGMA {} = {}".format(name, value)
+        self.log.debug(query)
 
-        return formatted_values
+        return self._conn.execute(query).fetchone()
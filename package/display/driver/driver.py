@@ -1,3 +1,6 @@
+import util.utils as utils
+
+
 class DisplayDriver:
     def __init__(self, **kwargs):
         pass
@@ -30,6 +33,15 @@ class DisplayDriver:
             )
         )
 
+    async def init_async(self):
+        return await utils.run_blocking(self.init)
+
+    async def clear_async(self):
+        return await utils.run_blocking(self.clear)
+
+    async def display_async(self, frame):
+        return await utils.run_blocking(self.display, frame)
+
     def __repr__(self):
         return self.__str__()
 
@@ -0,0 +1,133 @@
+import logging
+import threading
+from .device_group import DeviceGroup, DeviceGroupError
+
+
+class LightCommandBatch:
+    """Collects (group, hsbk, transition) targets and applies them in as few round trips as possible.
+
+    Targets are partitioned by device group class and handed to that class's
+    set_hsbk_batch, which may send one multi-group request or fan out in parallel.
+    """
+
+    def __init__(self):
+        self.log = logging.getLogger(self.__class__.__name__)
+        self._targets = []
+
+    def add(self, group, hsbk, transition_seconds=0):
+        self._targets.append((group, hsbk, transition_seconds))
+
+        return self
+
+    @property
+    def targets(self) -> list:
+        return self._targets
+
+    def apply(self) -> None:
+        targets_by_class = dict()
+        for target in self._targets:
+            group = target[0]
+            targets_by_class.setdefault(type(group), []).append(target)
+
+        errors = []
+        for group_class, targets in targets_by_class.items():
+            self.log.debug(
+                "Applying {} target(s) via {}".format(
+                    len(targets), group_class.__name__
+                )
+            )
+            try:
+                group_class.set_hsbk_batch(targets)
+            except DeviceGroupError as e:
+                errors.append(e)
+
+        if len(errors) > 0:
+            raise DeviceGroupError(
+                "unable to apply light command batch: {}".format(
+                    "; ".join([str(e) for e in errors])
+                )
+            )
+
+
+class LightCommandQueue:
+    """Applies light commands in the background, one at a time, latest first.
+
+    submit() returns straight away, so retries never hold up the caller. A command
+    submitted while another is being applied replaces any command still waiting,
+    so the lights end up in the most recently requested state without commands
+    racing each other. Each command is identified by a key, e.g. its hsbk, and
+    on_done(key, error) is called on the pool once it has been applied or failed.
+    """
+
+    def __init__(self, on_done=None):
+        self.log = logging.getLogger(self.__class__.__name__)
+        self._on_done = on_done
+        # re-entrant, as a future that's already done runs _finish as it's started
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        # (key, future) of the command being applied
+        self._running = None
+        # (key, func, args) of the command to apply next
+        self._waiting = None
+
+    @property
+    def pending_key(self):
+        """Returns the key of the latest command submitted that hasn't finished, or None"""
+        with self._lock:
+            if self._waiting is not None:
+                return self._waiting[0]
+            if self._running is not None:
+                return self._running[0]
+
+            return None
+
+    def wait(self, timeout=None) -> bool:
+        """Waits until every command submitted has finished; returns False on timeout"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._running is None, timeout)
+
+    def submit(self, key, func, *args) -> bool:
+        """Queues func(*args) as command key; returns False if it's already pending"""
+        with self._lock:
+            if self._running is None:
+                self._start(key, func, args)
+                return True
+
+            if self._running[0] == key:
+                # the latest request is the one already being applied
+                self._waiting = None
+                return False
+
+            if self._waiting is not None and self._waiting[0] == key:
+                return False
+
+            self._waiting = (key, func, args)
+            return True
+
+    def _start(self, key, func, args):
+        # called with the lock held
+        future = DeviceGroup.do_in_background(func, *args)
+        self._running = (key, future)
+        future.add_done_callback(lambda future: self._finish(key, future))
+
+    def _finish(self, key, future):
+        error = future.exception()
+        if error is not None and not isinstance(error, DeviceGroupError):
+            self.log.error("Light command {} raised an exception".format(key))
+            self.log.exception(error)
+
+        if self._on_done is not None:
+            try:
+                self._on_done(key, error)
+            except Exception as e:
+                self.log.exception(e)
+
+        with self._lock:
+            self._running = None
+            if self._waiting is not None:
+                key, func, args = self._waiting
+                self._waiting = None
+                self._start(key, func, args)
+
+            if self._running is None:
+                self._idle.notify_all()
@@ -1,5 +1,9 @@
 import time
+import threading
 import util.utils as utils
+from concurrent.futures import ThreadPoolExecutor, Future
+from .retry import RetryPolicy, CircuitBreaker, RetryStats
+from .state import DeviceGroupState
 
 import logging
 
@@ -10,8 +14,24 @@ class DeviceGroupError(Exception):
 
 
 class DeviceGroup:
+    LIFX_MAX_VALUE = 65535
+
+    # shared by all groups for commands retried in the background
+    _background_executor = None
+    _background_executor_lock = threading.Lock()
+
     def __init__(
-        self, name, devices, query_interval="2m", retry_interval="2s", max_retries=5
+        self,
+        name,
+        devices,
+        query_interval="2m",
+        retry_interval="2s",
+        max_retries=5,
+        max_retry_interval="30s",
+        retry_budget="10s",
+        failure_threshold=5,
+        reset_timeout="1m",
+        hsbk_tolerances=None,
     ):
         self._group_name = name
         self._devices = devices
@@ -20,6 +40,19 @@ class DeviceGroup:
         self._retry_interval_seconds = utils.dehumanize(retry_interval)
         self._max_retries = max_retries
 
+        self._retry_policy = RetryPolicy(
+            max_retries=max_retries,
+            initial_interval=self._retry_interval_seconds,
+            max_interval=utils.dehumanize(max_retry_interval),
+            budget=utils.dehumanize(retry_budget),
+        )
+        self._circuit_breaker = CircuitBreaker(
+            failure_threshold=failure_threshold,
+            reset_timeout=utils.dehumanize(reset_timeout),
+        )
+        self._retry_stats = RetryStats()
+        self._state = DeviceGroupState(tolerances=hsbk_tolerances)
+
         self._power = [False] * len(devices)
         self._hsbk = [{}] * len(devices)
         self._query_time = 0
@@ -61,33 +94,185 @@ class DeviceGroup:
             )
         )
 
+    @classmethod
+    def set_hsbk_batch(cls, targets) -> None:
+        """Applies a list of (group, hsbk, transition_seconds) targets, fanning out in parallel"""
+        if len(targets) == 1:
+            group, hsbk, transition_seconds = targets[0]
+            return group.set_hsbk(hsbk, transition_seconds)
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = [
+                executor.submit(group.set_hsbk, hsbk, transition_seconds)
+                for group, hsbk, transition_seconds in targets
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except DeviceGroupError as e:
+                    errors.append(e)
+
+        if len(errors) > 0:
+            raise DeviceGroupError("; ".join([str(e) for e in errors]))
+
+    def get_state(self) -> tuple[list, list]:
+        """Returns the (power, hsbk) lists of every device in the group"""
+        return self.get_power(), self.get_hsbk()
+
+    def normalize_hsbk(self, hsbk) -> dict:
+        """Returns a device or desired hsbk as a dict of hue, saturation, brightness and kelvin"""
+        if hsbk is None or isinstance(hsbk, dict):
+            return hsbk
+
+        # [hue, saturation, brightness, kelvin] in LIFX 16-bit units
+        hue, saturation, brightness, kelvin = hsbk
+        return {
+            "hue": utils.normalize_to_range(
+                hue,
+                0,
+                self.LIFX_MAX_VALUE,
+                utils.HSBK_HUE_MIN_VALUE,
+                utils.HSBK_HUE_MAX_VALUE,
+            ),
+            "saturation": utils.normalize_to_range(
+                saturation,
+                0,
+                self.LIFX_MAX_VALUE,
+                utils.HSBK_FLT_MIN_VALUE,
+                utils.HSBK_FLT_MAX_VALUE,
+            ),
+            "brightness": utils.normalize_to_range(
+                brightness,
+                0,
+                self.LIFX_MAX_VALUE,
+                utils.HSBK_FLT_MIN_VALUE,
+                utils.HSBK_FLT_MAX_VALUE,
+            ),
+            "kelvin": kelvin,
+        }
+
+    def normalize_power(self, power):
+        """Returns a device or desired power as a bool; LIFX reports 0 or 65535"""
+        if power is None:
+            return None
+
+        return bool(power)
+
+    def is_hsbk_current(self, hsbk) -> bool:
+        """Returns True if hsbk is within tolerance of the last confirmed state, so needn't be sent"""
+        return self._state.is_hsbk_confirmed(self.normalize_hsbk(hsbk))
+
+    def is_power_current(self, power) -> bool:
+        return self._state.is_power_confirmed(self.normalize_power(power))
+
+    def confirm_hsbk(self, hsbk, transition_seconds=0) -> None:
+        self._state.confirm_hsbk(self.normalize_hsbk(hsbk), transition_seconds)
+
+    def confirm_power(self, power, transition_seconds=0) -> None:
+        self._state.confirm_power(self.normalize_power(power), transition_seconds)
+
+    def reconcile(self) -> bool:
+        """Periodically compares observed device states to the desired state and re-sends it on drift"""
+        if not self.check_refresh():
+            return False
+
+        self.refresh()
+        if not self._state.drifted:
+            return False
+
+        desired_hsbk = self._state.desired_hsbk
+        self.log.info(
+            "device states drifted from desired state {}, re-sending".format(
+                desired_hsbk
+            )
+        )
+        self.set_hsbk(desired_hsbk)
+
+        return True
+
+    def check_circuit(self, name) -> None:
+        """Raises DeviceGroupError, without trying, while the group's circuit is open"""
+        if not self._circuit_breaker.allow():
+            self._retry_stats.record_fast_fail()
+            raise DeviceGroupError(
+                "unable to do {} on DeviceGroup {}: circuit open after repeated failures".format(
+                    name, self.name
+                )
+            )
+
     def do(self, doFunc, *args):
+        self.check_circuit(doFunc.__name__)
+
+        return self.do_shared([self], doFunc, *args)
+
+    def do_shared(self, groups, doFunc, *args):
+        """Retries doFunc, one request made on behalf of groups, with this group's policy.
+
+        Every group's circuit breaker and retry stats record the outcome; callers
+        check each group's circuit first.
+        """
+        start_time = time.monotonic()
         retries = 0
         err = None
+        names = ", ".join([group.name for group in groups])
 
-        while retries <= self._max_retries:
+        while True:
             try:
-                self.log.debug(
-                    "Do {} on DeviceGroup".format(doFunc.__name__, self.name)
-                )
+                self.log.debug("Do {} on DeviceGroup {}".format(doFunc.__name__, names))
 
-                return doFunc(*args)
+                result = doFunc(*args)
+
+                for group in groups:
+                    group._circuit_breaker.record_success()
+                    group._retry_stats.record(
+                        retries, time.monotonic() - start_time, failed=False
+                    )
+                return result
             except DeviceGroupError as e:
                 err = e
                 self.log.warning(
-                    "an error occurred communicating with DeviceGroup {}".format(
-                        self.name
-                    )
+                    "an error occurred communicating with DeviceGroup {}".format(names)
                 )
-                time.sleep(self._retry_interval_seconds)
+
+                delay = self._retry_policy.next_delay(
+                    retries, time.monotonic() - start_time
+                )
+                if delay is None:
+                    break
+
+                time.sleep(delay)
                 retries += 1
 
-        raise DeviceGroupError(
-            "unable to do {} on DeviceGroup {}: {}".format(
-                doFunc.__name__, self.name, err
+        for group in groups:
+            group._circuit_breaker.record_failure()
+            group._retry_stats.record(
+                retries, time.monotonic() - start_time, failed=True
             )
+
+        raise DeviceGroupError(
+            "unable to do {} on DeviceGroup {}: {}".format(doFunc.__name__, names, err)
         )
 
+    @staticmethod
+    def do_in_background(func, *args) -> Future:
+        """Runs func, e.g. a command and its retries, on a shared pool of all groups"""
+        with DeviceGroup._background_executor_lock:
+            if DeviceGroup._background_executor is None:
+                DeviceGroup._background_executor = ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="DeviceGroupRetry"
+                )
+
+        return DeviceGroup._background_executor.submit(func, *args)
+
+    @property
+    def retry_stats(self) -> dict:
+        return self._retry_stats.as_dict() | {"circuit": self._circuit_breaker.state}
+
+    @property
+    def state(self) -> DeviceGroupState:
+        return self._state
+
     @property
     def name(self) -> str:
         return self._group_name
@@ -126,9 +311,12 @@ class DeviceGroup:
         return time.time() - self.query_time >= self._query_interval_seconds
 
     def refresh(self) -> None:
-        self._power = self.get_power()
-        self._hsbk = self.get_hsbk()
+        self._power, self._hsbk = self.get_state()
         self._query_time = time.time()
+        self._state.observe(
+            [self.normalize_power(power) for power in self._power],
+            [self.normalize_hsbk(hsbk) for hsbk in self._hsbk],
+        )
 
         self.log.debug(
             "refreshed device states:\n\tpower: {}\n\thsbk: {}".format(
@@ -1,6 +1,7 @@
 import requests
 import urllib.parse
 import util.utils as utils
+from .http_session import LifxHTTPSession
 from ..device_group import DeviceGroup, DeviceGroupError
 
 class LifxHTTPGroup(DeviceGroup):
@@ -9,32 +10,51 @@ class LifxHTTPGroup(DeviceGroup):
     MIN_VALUE = 0
 
     def __init__(
-        self, name, token, query_interval="2m", retry_interval="0s", max_retries=0
+        self,
+        name,
+        token,
+        query_interval="2m",
+        retry_interval="0s",
+        max_retries=0,
+        base_url=LifxHTTPSession.LIFX_API_URL,
+        pool_size=4,
+        keep_alive=True,
+        timeout="5s",
+        **kwargs
     ):
         self.group_id = name
         self.req_header = {
             "Authorization": "Bearer %s" % token,
         }
+        self.session = LifxHTTPSession.get_session(
+            base_url=base_url,
+            pool_size=pool_size,
+            keep_alive=keep_alive,
+            timeout=utils.dehumanize(timeout),
+        )
         devices = self.get_devices()
-        super().__init__(name, devices, query_interval, retry_interval, max_retries)
+        super().__init__(
+            name, devices, query_interval, retry_interval, max_retries, **kwargs
+        )
 
     def get_devices(self) -> list:
-        response = requests.get("https://api.lifx.com/v1/lights/group:{}".format(self.group_id), headers=self.req_header)
+        response = self.session.get("/lights/group:{}".format(self.group_id), headers=self.req_header)
         data = response.json()
 
         return data
 
     def set_power(self, power, transition_seconds=0) -> None:
-        if power == self.power:
+        if self.is_power_current(power):
             return
 
         def _set_power(power, transition_seconds):
             duration = transition_seconds * 1000
             power_flag = "on" if power else "off"
             try:
-                response = requests.put("https://api.lifx.com/v1/lights/group:{}/state".format(self.name), headers=self.req_header, data={
+                response = self.session.put("/lights/group:{}/state".format(self.name), headers=self.req_header, data={
                     "power": power_flag
                 })
+                self.confirm_power(power, transition_seconds)
             except requests.exceptions.RequestException as re:
                 raise DeviceGroupError(re)
             except Exception as e:
@@ -43,62 +63,27 @@ class LifxHTTPGroup(DeviceGroup):
         return self.do(_set_power, power, transition_seconds)
 
     def get_power(self) -> list:
-        def _get_power():
-            power = []
-
-            try:
-                response = requests.get("https://api.lifx.com/v1/lights/group:{}".format(self.name), headers=self.req_header)
-                data = response.json()
-
-                for device in data:
-                    power.append(device["power"] == "on")
-            except requests.exceptions.RequestException as re:
-                raise DeviceGroupError("not all devices returned ok")
-            except Exception as e:
-                raise e
-
-            return power
+        power, _ = self.get_state()
 
-        return self.do(_get_power)
+        return power
 
     def set_hsbk(self, hsbk, transition_seconds=0) -> None:
-        if hsbk == self.hsbk:
+        if self.is_hsbk_current(hsbk):
             return
 
         def _set_hsbk(hsbk, transition_seconds):
-            duration = transition_seconds * 1000
-            payload = {}
-            color = ""
-            
-            if "hue" in hsbk:
-                color += "hue:{} ".format(hsbk["hue"])
-            if "saturation" in hsbk:
-                color += "saturation:{} ".format(hsbk["saturation"])
-            if "brightness" in hsbk:
-                brightness = hsbk["brightness"]
-                color += "brightness:{} ".format(brightness)
-                payload = payload | {
-                    "power": "on" if brightness > utils.HSBK_FLT_MIN_VALUE else "off"
-                }
-            if "kelvin" in hsbk:
-                color += "kelvin:{}".format(hsbk["kelvin"])
-
-            if len(color) > 0:
-                payload["color"] = color
-                
+            payload = self._hsbk_payload(hsbk, transition_seconds)
             self.log.debug("LIFX payload: {}".format(payload))
 
             try:    
-                res = requests.put("https://api.lifx.com/v1/lights/group:{}/state".format(self.name), 
+                res = self.session.put("/lights/group:{}/state".format(self.name), 
                     headers=self.req_header, data=payload)
                 body = res.json()
                 self.log.debug("LIFX response body: {}".format(body))
 
                 if res.ok:
-                    results = body["results"]
-                    for device in results:
-                        if device["status"] == "timed_out":
-                            raise DeviceGroupError("Device {} timed out".format(device["id"]))
+                    self._check_results(body["results"])
+                    self.confirm_hsbk(hsbk, transition_seconds)
                 else:
                     raise Exception(res.json()["error"])
             except requests.exceptions.RequestException as re:
@@ -108,24 +93,127 @@ class LifxHTTPGroup(DeviceGroup):
 
         return self.do(_set_hsbk, hsbk, transition_seconds)
 
+    @classmethod
+    def set_hsbk_batch(cls, targets) -> None:
+        # groups can only share a request if they share a session and token
+        requests_by_account = dict()
+        for group, hsbk, transition_seconds in targets:
+            if group.is_hsbk_current(hsbk):
+                continue
+
+            key = (id(group.session), group.req_header["Authorization"])
+            requests_by_account.setdefault(key, []).append(
+                (group, hsbk, transition_seconds)
+            )
+
+        errors = []
+        for account_targets in requests_by_account.values():
+            # each group fast-fails on its own open circuit, the rest share a request
+            allowed_targets = []
+            for target in account_targets:
+                try:
+                    target[0].check_circuit(cls._set_states.__name__)
+                    allowed_targets.append(target)
+                except DeviceGroupError as e:
+                    errors.append(e)
+
+            if len(allowed_targets) == 0:
+                continue
+
+            groups = [group for group, _, _ in allowed_targets]
+            try:
+                groups[0].do_shared(groups, cls._set_states, allowed_targets)
+            except DeviceGroupError as e:
+                errors.append(e)
+
+        if len(errors) > 0:
+            raise DeviceGroupError("; ".join([str(e) for e in errors]))
+
+    @classmethod
+    def _set_states(cls, targets) -> None:
+        first_group = targets[0][0]
+        states = [
+            {"selector": "group:{}".format(group.name)}
+            | group._hsbk_payload(hsbk, transition_seconds)
+            for group, hsbk, transition_seconds in targets
+        ]
+        first_group.log.debug("LIFX states payload: {}".format(states))
+
+        try:
+            res = first_group.session.put(
+                "/lights/states",
+                headers=first_group.req_header,
+                json={"states": states},
+            )
+            body = res.json()
+            first_group.log.debug("LIFX response body: {}".format(body))
+
+            if res.ok:
+                for operation in body["results"]:
+                    first_group._check_results(operation["results"])
+                for group, hsbk, transition_seconds in targets:
+                    group.confirm_hsbk(hsbk, transition_seconds)
+            else:
+                raise Exception(body["error"])
+        except requests.exceptions.RequestException as re:
+            raise DeviceGroupError(re)
+        except Exception as e:
+            raise e
+
+    def _hsbk_payload(self, hsbk, transition_seconds):
+        payload = {}
+        color = ""
+
+        if "hue" in hsbk:
+            color += "hue:{} ".format(hsbk["hue"])
+        if "saturation" in hsbk:
+            color += "saturation:{} ".format(hsbk["saturation"])
+        if "brightness" in hsbk:
+            brightness = hsbk["brightness"]
+            color += "brightness:{} ".format(brightness)
+            payload = payload | {
+                "power": "on" if brightness > utils.HSBK_FLT_MIN_VALUE else "off"
+            }
+        if "kelvin" in hsbk:
+            color += "kelvin:{}".format(hsbk["kelvin"])
+
+        if len(color) > 0:
+            payload["color"] = color.strip()
+        if transition_seconds > 0:
+            payload["duration"] = transition_seconds
+
+        return payload
+
+    def _check_results(self, results):
+        for device in results:
+            if device["status"] == "timed_out":
+                raise DeviceGroupError("Device {} timed out".format(device["id"]))
+
     def get_hsbk(self) -> list:
-        def _get_hsbk():
+        _, hsbk = self.get_state()
+
+        return hsbk
+
+    def get_state(self) -> tuple[list, list]:
+        def _get_state():
+            power = []
             hsbk = []
 
             try:
-                response = requests.get("https://api.lifx.com/v1/lights/group:{}".format(self.name), headers=self.req_header)
+                response = self.session.get("/lights/group:{}".format(self.name), headers=self.req_header)
                 data = response.json()
 
                 for device in data:
-                    hsbk = device["color"] | {"brightness": round(device["brightness"], utils.HSBK_FLT_PRECISION)}
+                    power.append(device["power"] == "on")
+                    hsbk.append(device["color"] | {"brightness": round(device["brightness"], utils.HSBK_FLT_PRECISION)})
             except requests.exceptions.RequestException as re:
                 raise DeviceGroupError(re)
             except Exception as e:
                 raise e
 
-            return hsbk
+            return power, hsbk
 
-        return self.do(_get_hsbk)
+        return self.do(_get_state)
 
     def _normalize_to_range(self, x, old_r_min, old_r_max, new_r_min, new_r_max):
         return round(((x - old_r_min) / (old_r_max - old_r_min)) * (new_r_max - new_r_min) + new_r_min, 2)
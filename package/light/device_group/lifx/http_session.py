@@ -0,0 +1,71 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class LifxHTTPSession:
+    """A connection-pooled, keep-alive session shared by every LifxHTTPGroup.
+
+    Sessions are cached per (base_url, pool_size, keep_alive, timeout) so groups with
+    the same settings reuse the same TCP/TLS connections to the LIFX API.
+    """
+
+    LIFX_API_URL = "https://api.lifx.com/v1"
+
+    _sessions = dict()
+    _sessions_lock = threading.Lock()
+
+    @classmethod
+    def get_session(
+        cls, base_url=LIFX_API_URL, pool_size=4, keep_alive=True, timeout=5
+    ) -> "LifxHTTPSession":
+        key = (base_url.rstrip("/"), pool_size, keep_alive, timeout)
+
+        with cls._sessions_lock:
+            if key not in cls._sessions:
+                cls._sessions[key] = cls(*key)
+
+            return cls._sessions[key]
+
+    def __init__(self, base_url, pool_size, keep_alive, timeout):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._base_url = base_url
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._requests = 0
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        if not keep_alive:
+            self._session.headers["Connection"] = "close"
+
+        self.log.debug(
+            "New session for {} (pool size: {}, keep-alive: {}, timeout: {}s)".format(
+                base_url, pool_size, keep_alive, timeout
+            )
+        )
+
+    @property
+    def request_count(self) -> int:
+        return self._requests
+
+    def get(self, path, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def put(self, path, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def request(self, method, path, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self._timeout)
+
+        with self._lock:
+            self._requests += 1
+
+        return self._session.request(method, self._base_url + path, **kwargs)
+
+    def close(self):
+        self._session.close()
@@ -1,61 +1,73 @@
-import time
+import util.utils as utils
 from lifxlan import Group, WorkflowException
+from .lan_query import LanQueryEngine
 from ..device_group import DeviceGroup, DeviceGroupError
 
 
 class LifxLANGroup(DeviceGroup):
+    DEFAULT_KELVIN = 3500
+
     def __init__(
-        self, name, devices, query_interval="2m", retry_interval="2s", max_retries=5
+        self,
+        name,
+        devices,
+        query_interval="2m",
+        retry_interval="2s",
+        max_retries=5,
+        query_deadline="2s",
+        **kwargs
     ):
         self.lifxgroup = Group(devices)
-        super().__init__(name, devices, query_interval, retry_interval, max_retries)
+        self.query_engine = LanQueryEngine(
+            max_workers=max(1, len(devices)),
+            deadline_seconds=utils.dehumanize(query_deadline),
+        )
+        self.missing_devices = []
+        super().__init__(
+            name, devices, query_interval, retry_interval, max_retries, **kwargs
+        )
 
     def get_devices(self) -> list:
         return self.lifxgroup.get_device_list()
 
     def set_power(self, power, transition_seconds=0) -> None:
-        if power == self.power:
+        if self.is_power_current(power):
             return
 
-        def _set_power(power, transition_seconds):
-            duration = transition_seconds * 1000
-            try:
-                self.lifxgroup.set_power(power, duration)
-                self.refresh()
-            except WorkflowException as e:
-                raise DeviceGroupError(e)
+        return self.do(self._set_power, power, transition_seconds)
 
-        return self.do(_set_power, power, transition_seconds)
+    def _set_power(self, power, transition_seconds):
+        # a single attempt, for do() or an operation do() is already retrying
+        if self.is_power_current(power):
+            return
+
+        duration = transition_seconds * 1000
+        try:
+            self.lifxgroup.set_power(power, duration)
+            self.confirm_power(power, transition_seconds)
+        except WorkflowException as e:
+            raise DeviceGroupError(e)
 
     def get_power(self) -> list:
         def _get_power():
-            power = []
-
-            try:
-                power = [device.get_power() for device in self.devices]
-            except WorkflowException as e:
-                raise DeviceGroupError(e)
-
-            return power
+            return self._query(lambda device: self.normalize_power(device.get_power()))
 
         return self.do(_get_power)
 
     def set_hsbk(self, hsbk, transition_seconds=0) -> None:
-        if hsbk == self.hsbk:
+        if self.is_hsbk_current(hsbk):
             return
 
         def _set_hsbk(hsbk, transition_seconds):
-            brightness = hsbk[2]
+            color = self._to_lifx_color(hsbk)
+            brightness = color[2]
             duration = transition_seconds * 1000
 
             try:
-                if brightness > 0:
-                    self.set_power(True, transition_seconds)
-                else:
-                    self.set_power(False, transition_seconds)
+                self._set_power(brightness > 0, transition_seconds)
 
-                self.lifxgroup.set_color(hsbk, duration)
-                self.refresh()
+                self.lifxgroup.set_color(color, duration)
+                self.confirm_hsbk(hsbk, transition_seconds)
             except WorkflowException as e:
                 raise DeviceGroupError(e)
 
@@ -63,28 +75,91 @@ class LifxLANGroup(DeviceGroup):
 
     def get_hsbk(self) -> list:
         def _get_hsbk():
-            hsbk = []
+            return self._query(lambda device: device.get_color())
 
-            try:
-                hsbk = [device.get_color() for device in self.devices]
-            except WorkflowException as e:
-                raise DeviceGroupError(e)
+        return self.do(_get_hsbk)
 
-            return hsbk
+    def get_state(self) -> tuple[list, list]:
+        def _get_state():
+            states = self._query(
+                lambda device: (
+                    self.normalize_power(device.get_power()),
+                    device.get_color(),
+                )
+            )
+            power = [state[0] if state is not None else None for state in states]
+            hsbk = [state[1] if state is not None else None for state in states]
 
-        return self.do(_get_hsbk)
+            return power, hsbk
 
-    def refresh(self) -> None:
-        self._power = self.get_power()
-        self._hsbk = self.get_hsbk()
-        self._query_time = time.time()
+        return self.do(_get_state)
 
-        self.log.debug(
-            "refreshed device states:\n\tpower: {}\n\thsbk: {}".format(
-                self._power, self._hsbk
-            )
+    def _to_lifx_color(self, hsbk) -> list:
+        if not isinstance(hsbk, dict):
+            return hsbk
+
+        # fields the hsbk leaves out keep the last observed value
+        observed = [h for h in self.state.observed_hsbk if h is not None]
+        current = observed[0] if len(observed) > 0 else {}
+        hsbk = (
+            {
+                "hue": utils.HSBK_HUE_MIN_VALUE,
+                "saturation": utils.HSBK_FLT_MIN_VALUE,
+                "brightness": utils.HSBK_FLT_MIN_VALUE,
+                "kelvin": self.DEFAULT_KELVIN,
+            }
+            | current
+            | hsbk
         )
 
+        return [
+            round(
+                utils.normalize_to_range(
+                    hsbk["hue"],
+                    utils.HSBK_HUE_MIN_VALUE,
+                    utils.HSBK_HUE_MAX_VALUE,
+                    0,
+                    self.LIFX_MAX_VALUE,
+                )
+            ),
+            round(
+                utils.normalize_to_range(
+                    hsbk["saturation"],
+                    utils.HSBK_FLT_MIN_VALUE,
+                    utils.HSBK_FLT_MAX_VALUE,
+                    0,
+                    self.LIFX_MAX_VALUE,
+                )
+            ),
+            round(
+                utils.normalize_to_range(
+                    hsbk["brightness"],
+                    utils.HSBK_FLT_MIN_VALUE,
+                    utils.HSBK_FLT_MAX_VALUE,
+                    0,
+                    self.LIFX_MAX_VALUE,
+                )
+            ),
+            hsbk["kelvin"],
+        ]
+
+    def _query(self, func) -> list:
+        result = self.query_engine.query(self.devices, func)
+        if len(result.devices) == 0:
+            raise DeviceGroupError("no devices in the group to query")
+        if result.empty:
+            raise DeviceGroupError("no devices answered within the query deadline")
+
+        self.missing_devices = result.missing
+        if result.partial:
+            self.log.warning(
+                "{} of {} device(s) did not answer: {}".format(
+                    len(result.missing), len(result.devices), result.missing
+                )
+            )
+
+        return result.values
+
     def __repr__(self) -> str:
         return ", ".join(
             [
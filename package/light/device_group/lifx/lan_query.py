@@ -0,0 +1,85 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class LanQueryResult:
+    def __init__(self, devices, values, missing):
+        self.devices = devices
+        self.values = values
+        self.missing = missing
+
+    @property
+    def partial(self) -> bool:
+        return len(self.missing) > 0
+
+    @property
+    def empty(self) -> bool:
+        """True if there were devices to query but none of them answered"""
+        return len(self.devices) > 0 and len(self.missing) == len(self.devices)
+
+
+class LanQueryEngine:
+    """Queries every device of a group at once and collects replies within one shared deadline.
+
+    Devices that don't answer in time, or whose query raised, are reported as missing
+    and their value is None. A query still running past its deadline can't be
+    cancelled, so its device is reported missing without being queried again until
+    it has finished, rather than piling more queries onto the executor.
+    """
+
+    def __init__(self, max_workers=8, deadline_seconds=2):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._deadline_seconds = deadline_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=self.__class__.__name__
+        )
+        # device -> its query that was still running at the deadline
+        self._overdue = dict()
+        self._lock = threading.Lock()
+
+    def query(self, devices, func) -> LanQueryResult:
+        if len(devices) == 0:
+            return LanQueryResult(devices, [], [])
+
+        futures = []
+        with self._lock:
+            for device in devices:
+                overdue = self._overdue.get(device)
+                if overdue is not None and not overdue.done():
+                    futures.append(None)
+                    continue
+
+                self._overdue.pop(device, None)
+                futures.append(self._executor.submit(func, device))
+
+        done, _ = wait(
+            [future for future in futures if future is not None],
+            timeout=self._deadline_seconds,
+        )
+
+        values = []
+        missing = []
+        for device, future in zip(devices, futures):
+            if future in done and future.exception() is None:
+                values.append(future.result())
+                continue
+
+            if future is None:
+                self.log.debug("{} is still busy with an earlier query".format(device))
+            elif future in done:
+                self.log.debug("{} query failed: {}".format(device, future.exception()))
+            else:
+                self.log.debug("{} did not answer in time".format(device))
+                if not future.cancel():
+                    with self._lock:
+                        self._overdue[device] = future
+
+            values.append(None)
+            missing.append(device)
+
+        return LanQueryResult(devices, values, missing)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
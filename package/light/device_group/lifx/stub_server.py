@@ -0,0 +1,163 @@
+import json
+import logging
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class LifxStubServer:
+    """A local stand-in for the LIFX HTTP API to measure requests and connections offline.
+
+    Point a LifxHTTPGroup at it with base_url=server.base_url. Every selector resolves
+    to devices_per_group fake lights whose state is kept in memory.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, devices_per_group=2):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._devices_per_group = devices_per_group
+        self._groups = dict()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.connections = 0
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/v1".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+
+    def get_devices(self, group_name) -> list:
+        with self._lock:
+            if group_name not in self._groups:
+                self._groups[group_name] = [
+                    {
+                        "id": "{}-{}".format(group_name, i),
+                        "label": "{} #{}".format(group_name, i),
+                        "power": "off",
+                        "color": {"hue": 0, "saturation": 0.0, "kelvin": 3500},
+                        "brightness": 0.0,
+                        "group": {"name": group_name},
+                    }
+                    for i in range(self._devices_per_group)
+                ]
+
+            return self._groups[group_name]
+
+    def set_state(self, group_name, state):
+        results = []
+
+        for device in self.get_devices(group_name):
+            if "power" in state:
+                device["power"] = state["power"]
+            if "color" in state:
+                for part in state["color"].split():
+                    key, value = part.split(":")
+                    if key == "brightness":
+                        device["brightness"] = float(value)
+                    elif key == "saturation":
+                        device["color"][key] = float(value)
+                    else:
+                        device["color"][key] = int(float(value))
+            results.append(
+                {"id": device["id"], "label": device["label"], "status": "ok"}
+            )
+
+        return results
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 so clients can keep connections alive
+            protocol_version = "HTTP/1.1"
+            # headers and body go out as separate writes on a kept-alive socket
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                stub._count_request()
+                group_name = self._parse_group_selector(self.path)
+                if group_name is None:
+                    return self._respond(404, {"error": "unknown selector"})
+
+                self._respond(200, stub.get_devices(group_name))
+
+            def do_PUT(self):
+                stub._count_request()
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+
+                if self.path.rstrip("/").endswith("/lights/states"):
+                    payload = json.loads(body)
+                    defaults = payload.get("defaults", {})
+                    results = []
+                    for state in payload.get("states", []):
+                        state = defaults | state
+                        group_name = self._parse_group_selector(state["selector"])
+                        results.append(
+                            {
+                                "operation": state,
+                                "results": stub.set_state(group_name, state),
+                            }
+                        )
+                    return self._respond(207, {"results": results})
+
+                group_name = self._parse_group_selector(
+                    self.path.rsplit("/state", 1)[0]
+                )
+                if group_name is None:
+                    return self._respond(404, {"error": "unknown selector"})
+
+                state = {
+                    key: values[0]
+                    for key, values in urllib.parse.parse_qs(body).items()
+                }
+                self._respond(207, {"results": stub.set_state(group_name, state)})
+
+            def log_message(self, format, *args):
+                stub.log.debug(format % args)
+
+            def _parse_group_selector(self, path):
+                selector = urllib.parse.unquote(path.rstrip("/").rsplit("/", 1)[-1])
+                if not selector.startswith("group:"):
+                    return None
+
+                return selector[len("group:") :]
+
+            def _respond(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _count_request(self):
+        with self._lock:
+            self.requests += 1
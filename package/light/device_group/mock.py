@@ -15,15 +15,25 @@ class MockDeviceGroup(DeviceGroup):
         return [device.get_power() for device in self.devices]
 
     def set_power(self, power, transition_seconds=0) -> None:
+        if self.is_power_current(power):
+            return
+
         for device in self.devices:
             device.set_power(power)
+        self.confirm_power(power, transition_seconds)
 
     def get_hsbk(self) -> list:
         return [device.get_hsbk() for device in self.devices]
 
     def set_hsbk(self, hsbk, transition_seconds=0) -> None:
+        if self.is_hsbk_current(hsbk):
+            return
+
         for device in self.devices:
+            if isinstance(hsbk, dict) and "brightness" in hsbk:
+                device.set_power(hsbk["brightness"] > 0)
             device.set_hsbk(hsbk)
+        self.confirm_hsbk(hsbk, transition_seconds)
 
     def __repr__(self) -> str:
         return ", ".join([str(device) for device in self.devices])
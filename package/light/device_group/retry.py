@@ -0,0 +1,132 @@
+import time
+import random
+import threading
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by a retry count and a total time budget."""
+
+    def __init__(
+        self,
+        max_retries=5,
+        initial_interval=2,
+        max_interval=30,
+        multiplier=2,
+        jitter=0.5,
+        budget=None,
+    ):
+        self.max_retries = max_retries
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.budget = budget
+
+    def backoff(self, attempt) -> float:
+        interval = min(
+            self.max_interval, self.initial_interval * self.multiplier**attempt
+        )
+        # keep at least (1 - jitter) of the interval so retries don't collapse to 0
+        return interval * (1 - self.jitter * random.random())
+
+    def next_delay(self, attempt, elapsed_seconds):
+        """Returns the seconds to wait before retry number attempt + 1, or None to give up."""
+        if attempt >= self.max_retries:
+            return None
+
+        delay = self.backoff(attempt)
+        if self.budget is not None and elapsed_seconds + delay > self.budget:
+            return None
+
+        return delay
+
+    def __str__(self):
+        return "RetryPolicy(max_retries={}, interval={}-{}s, budget={})".format(
+            self.max_retries, self.initial_interval, self.max_interval, self.budget
+        )
+
+
+class CircuitBreaker:
+    """Fast-fails calls after failure_threshold consecutive failures.
+
+    Once open, a single trial call is let through after reset_timeout seconds; it
+    closes the circuit on success and re-opens it on failure.
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+
+        self._state = self.STATE_CLOSED
+        self._failures = 0
+        self._opened_time = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.STATE_CLOSED:
+                return True
+
+            if self._state == self.STATE_OPEN:
+                if time.monotonic() - self._opened_time >= self._reset_timeout:
+                    self._state = self.STATE_HALF_OPEN
+                    return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.STATE_CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+
+            if (
+                self._state == self.STATE_HALF_OPEN
+                or self._failures >= self._failure_threshold
+            ):
+                self._state = self.STATE_OPEN
+                self._opened_time = time.monotonic()
+
+
+class RetryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.fast_fails = 0
+        self.time_spent = 0
+
+    def record(self, retries, elapsed_seconds, failed):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            self.time_spent += elapsed_seconds
+            if failed:
+                self.failures += 1
+
+    def record_fast_fail(self):
+        with self._lock:
+            self.fast_fails += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "fast_fails": self.fast_fails,
+                "time_spent": round(self.time_spent, 3),
+            }
@@ -0,0 +1,111 @@
+import time
+import threading
+
+
+class DeviceGroupState:
+    """Tracks the desired and last confirmed state of a device group.
+
+    HSBK values are compared as dicts of hue (0-360), saturation (0-1), brightness (0-1)
+    and kelvin, field by field within a tolerance, and only on the fields the desired
+    state sets. A command is needed only when the desired state differs from the last
+    confirmed one. Observed device states that drift from the desired state once any
+    transition has finished clear the confirmation so the command is re-sent.
+    """
+
+    HSBK_TOLERANCES = {
+        "hue": 1,
+        "saturation": 0.01,
+        "brightness": 0.01,
+        "kelvin": 50,
+    }
+
+    def __init__(self, tolerances=None):
+        self._tolerances = self.HSBK_TOLERANCES | (tolerances or {})
+        self._lock = threading.Lock()
+
+        self.desired_hsbk = None
+        self.desired_power = None
+        self.confirmed_hsbk = None
+        self.confirmed_power = None
+        self.observed_hsbk = []
+        self.observed_power = []
+        self.drifted = False
+
+        self._settle_time = 0
+
+    def hsbk_matches(self, hsbk, other) -> bool:
+        if hsbk is None or other is None:
+            return False
+
+        for field, value in hsbk.items():
+            if field not in other:
+                return False
+            if abs(value - other[field]) > self._tolerances.get(field, 0):
+                return False
+
+        return True
+
+    def is_hsbk_confirmed(self, hsbk) -> bool:
+        with self._lock:
+            if "brightness" in hsbk and self.confirmed_power != (
+                hsbk["brightness"] > 0
+            ):
+                return False
+
+            return self.hsbk_matches(hsbk, self.confirmed_hsbk)
+
+    def is_power_confirmed(self, power) -> bool:
+        with self._lock:
+            return self.confirmed_power is not None and self.confirmed_power == power
+
+    def confirm_hsbk(self, hsbk, transition_seconds=0):
+        with self._lock:
+            self.desired_hsbk = hsbk
+            self.confirmed_hsbk = hsbk
+            if "brightness" in hsbk:
+                self.desired_power = hsbk["brightness"] > 0
+                self.confirmed_power = self.desired_power
+            self.drifted = False
+            self._settle_time = time.monotonic() + transition_seconds
+
+    def confirm_power(self, power, transition_seconds=0):
+        with self._lock:
+            self.desired_power = power
+            self.confirmed_power = power
+            self.drifted = False
+            self._settle_time = time.monotonic() + transition_seconds
+
+    def observe(self, power, hsbk) -> bool:
+        """Records observed device states; returns True if they drifted from the desired state."""
+        with self._lock:
+            self.observed_power = power
+            self.observed_hsbk = hsbk
+
+            answered = [h for h in hsbk if h is not None]
+            if len(answered) == 0:
+                return False
+
+            if self.desired_hsbk is None:
+                # nothing commanded yet: adopt the devices' state if they agree
+                if len(set(power)) == 1 and all(
+                    self.hsbk_matches(answered[0], h) for h in answered
+                ):
+                    self.confirmed_hsbk = answered[0]
+                    self.confirmed_power = power[0]
+                return False
+
+            if time.monotonic() < self._settle_time:
+                return False
+
+            drifted = not all(self.hsbk_matches(self.desired_hsbk, h) for h in answered)
+            if self.desired_power is not None:
+                drifted = drifted or any(
+                    p is not None and p != self.desired_power for p in power
+                )
+
+            if drifted:
+                self.confirmed_hsbk = None
+                self.confirmed_power = None
+            self.drifted = drifted
+
+            return drifted
@@ -6,9 +6,25 @@ class PIR(MotionSensor):
     def __init__(self, pin=4):
         name = "PIR"
 
+        self._motion_callbacks = []
+
         self.pir = gpiozero.MotionSensor(pin)
+        # gpiozero calls these from its own thread on the pin's edges
+        self.pir.when_motion = lambda: self._on_edge(True)
+        self.pir.when_no_motion = lambda: self._on_edge(False)
         super().__init__(name)
 
     @property
     def motion(self) -> bool:
         return self.pir.motion_detected
+
+    @property
+    def supports_motion_events(self) -> bool:
+        return True
+
+    def add_motion_callback(self, callback) -> None:
+        self._motion_callbacks.append(callback)
+
+    def _on_edge(self, motion):
+        for callback in self._motion_callbacks:
+            callback(self, motion)
@@ -0,0 +1,89 @@
+import logging
+
+
+class I2CTransport:
+    # SMBus block transfers are limited to 32 data bytes
+    I2C_BLOCK_MAX = 32
+
+    def __init__(self, bus_number, address, bus=None):
+        self.log = logging.getLogger(self.__class__.__name__)
+
+        self._address = address
+        self._bus = bus if bus is not None else self._open_bus(bus_number)
+
+        self.block_reads = 0
+        self.block_errors = 0
+        self.byte_reads = 0
+        self.fallbacks = 0
+
+    def read_register(self, register) -> int:
+        self.byte_reads += 1
+        return self._bus.read_byte_data(self._address, register)
+
+    def read_registers(self, start, end, validate=None) -> list:
+        """Reads registers start..end (inclusive) in one block transfer.
+
+        Registers missing from a short block, or rejected by validate(register, value),
+        are re-read one byte at a time and counted as fallbacks.
+        """
+        count = end - start + 1
+        if count > self.I2C_BLOCK_MAX:
+            raise ValueError(
+                "cannot block read {} registers (max {})".format(
+                    count, self.I2C_BLOCK_MAX
+                )
+            )
+
+        values = []
+        try:
+            values = list(self._bus.read_i2c_block_data(self._address, start, count))
+            self.block_reads += 1
+        except OSError as e:
+            self.block_errors += 1
+            self.log.warning(
+                "block read failed, falling back to byte reads: {}".format(e)
+            )
+
+        for offset in range(count):
+            register = start + offset
+
+            if offset < len(values):
+                if validate is None or validate(register, values[offset]):
+                    continue
+                values[offset] = self._fallback(register)
+            else:
+                values.append(self._fallback(register))
+
+        return values[:count]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "block_reads": self.block_reads,
+            "block_errors": self.block_errors,
+            "byte_reads": self.byte_reads,
+            "fallbacks": self.fallbacks,
+        }
+
+    def close(self):
+        if self._bus is not None:
+            self._bus.close()
+            self._bus = None
+
+    def _fallback(self, register):
+        self.fallbacks += 1
+        self.log.debug("re-reading register 0x{:02X} byte-wise".format(register))
+
+        return self.read_register(register)
+
+    def _open_bus(self, bus_number):
+        # imported here so the transport can run against a stand-in bus off the Pi
+        import smbus
+
+        return smbus.SMBus(bus_number)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return "I2CTransport::0x{:02X}".format(self._address)
@@ -0,0 +1,81 @@
+import time
+import random
+from .sensorhub import DockerPiSensorHub
+
+
+class MockDockerPiSensorHub(DockerPiSensorHub):
+    def __init__(self, **kwargs):
+        snapshot_ttl = kwargs.get("snapshot_ttl", "1s")
+        bus = MockSMBus(
+            transaction_latency=kwargs.get("transaction_latency", 0),
+            corrupt_registers=kwargs.get("corrupt_registers", []),
+        )
+
+        super().__init__(snapshot_ttl=snapshot_ttl, bus=bus)
+
+
+class MockSMBus:
+    """Stand-in for smbus.SMBus that emulates the SensorHub register map.
+
+    Each call is counted as one I2C transaction and can be delayed by
+    transaction_latency seconds to approximate a busy bus.
+    """
+
+    REGISTER_COUNT = 0x0E
+
+    def __init__(self, transaction_latency=0, corrupt_registers=[]):
+        self._transaction_latency = transaction_latency
+        self._corrupt_registers = list(corrupt_registers)
+
+        self.transactions = 0
+        self.byte_transactions = 0
+        self.block_transactions = 0
+
+    def read_byte_data(self, addr, register):
+        self._transaction()
+        self.byte_transactions += 1
+
+        return self._registers()[register]
+
+    def read_i2c_block_data(self, addr, register, length):
+        self._transaction()
+        self.block_transactions += 1
+
+        registers = self._registers()
+        block = registers[register : register + length]
+        for reg in self._corrupt_registers:
+            if register <= reg < register + length:
+                block[reg - register] = 0xFF
+
+        return block
+
+    def close(self):
+        pass
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.byte_transactions = 0
+        self.block_transactions = 0
+
+    def _transaction(self):
+        self.transactions += 1
+        if self._transaction_latency > 0:
+            time.sleep(self._transaction_latency)
+
+    def _registers(self):
+        pressure = random.randrange(95000, 105000)
+        brightness = random.randrange(0, 1800)
+
+        registers = [0x00] * self.REGISTER_COUNT
+        registers[DockerPiSensorHub.TEMP_REG] = random.randrange(15, 30)
+        registers[DockerPiSensorHub.LIGHT_REG_L] = brightness & 0xFF
+        registers[DockerPiSensorHub.LIGHT_REG_H] = brightness >> 8
+        registers[DockerPiSensorHub.ON_BOARD_TEMP_REG] = random.randrange(15, 30)
+        registers[DockerPiSensorHub.ON_BOARD_HUMIDITY_REG] = random.randrange(0, 100)
+        registers[DockerPiSensorHub.BMP280_TEMP_REG] = random.randrange(15, 30)
+        registers[DockerPiSensorHub.BMP280_PRESSURE_REG_L] = pressure & 0xFF
+        registers[DockerPiSensorHub.BMP280_PRESSURE_REG_M] = (pressure >> 8) & 0xFF
+        registers[DockerPiSensorHub.BMP280_PRESSURE_REG_H] = pressure >> 16
+        registers[DockerPiSensorHub.HUMAN_DETECT] = random.choice([0, 1])
+
+        return registers
@@ -1,7 +1,42 @@
-import smbus
+import time
+import threading
+import util.utils as utils
+from .i2c import I2CTransport
 from ..environment import SensorHub
 
 
+class RegisterSnapshot:
+    """An immutable copy of the SensorHub register map taken in a single read."""
+
+    __slots__ = ("_registers", "_read_time")
+
+    def __init__(self, registers, read_time):
+        object.__setattr__(self, "_registers", tuple(registers))
+        object.__setattr__(self, "_read_time", read_time)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+    def __getitem__(self, register):
+        return self._registers[register]
+
+    def __len__(self):
+        return len(self._registers)
+
+    @property
+    def read_time(self) -> float:
+        return self._read_time
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._read_time
+
+    def __repr__(self):
+        return "RegisterSnapshot({})".format(
+            " ".join("{:02X}".format(reg) for reg in self._registers)
+        )
+
+
 class DockerPiSensorHub(SensorHub):
     BOARD_STATUS_OK = "OK"
     BOARD_STATUS_ERROR = "ERROR"
@@ -27,52 +62,104 @@ class DockerPiSensorHub(SensorHub):
 
     EMPTY_RECEIVE_BUG = [0x00]
 
-    def __init__(self):
+    BOOLEAN_REGS = (ON_BOARD_SENSOR_ERROR, BMP280_STATUS, HUMAN_DETECT)
+    MAX_HUMIDITY = 100
+
+    def __init__(self, snapshot_ttl="1s", bus=None):
         name = "SensorHub"
         super().__init__(name)
 
-        status, _, _ = self.status()
+        self._snapshot_ttl_seconds = utils.dehumanize(snapshot_ttl)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._transport = None
+        # the bus handle is held for the lifetime of the sensor
+        self._transport = I2CTransport(self.DEVICE_BUS, self.DEVICE_ADDR, bus=bus)
+
+        status, _, _ = self.status(force=True)
         if status == self.BOARD_STATUS_ERROR:
             raise ValueError("Failed to initialize with status: {}".format(status))
 
         self.log.debug("Initialized with status: {}".format(status))
 
-    def read(self):
-        bus = smbus.SMBus(self.DEVICE_BUS)
+    def read(self, force=False) -> RegisterSnapshot:
+        with self._lock:
+            if force or self._is_stale_snapshot():
+                self._snapshot = RegisterSnapshot(
+                    self._read_registers(), time.monotonic()
+                )
 
+            return self._snapshot
+
+    @property
+    def snapshot(self) -> RegisterSnapshot:
+        return self.read()
+
+    @property
+    def freshness_seconds(self):
+        return self._snapshot_ttl_seconds
+
+    @property
+    def bus(self):
+        return "i2c{}".format(self.DEVICE_BUS)
+
+    @property
+    def transport(self) -> I2CTransport:
+        return self._transport
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def _read_registers(self):
         data_buffer = [0x00]
-        for i in range(self.TEMP_REG, self.HUMAN_DETECT + 1):
-            data_buffer.append(bus.read_byte_data(self.DEVICE_ADDR, i))
-        bus.close()
+        data_buffer += self._transport.read_registers(
+            self.TEMP_REG, self.HUMAN_DETECT, validate=self._is_valid_register
+        )
 
         return data_buffer
 
+    def _is_valid_register(self, register, value):
+        if register in self.BOOLEAN_REGS:
+            return value in (0, 1)
+        if register == self.ON_BOARD_HUMIDITY_REG:
+            return value <= self.MAX_HUMIDITY
+
+        return True
+
+    def _is_stale_snapshot(self):
+        if self._snapshot is None:
+            return True
+
+        return self._snapshot.age >= self._snapshot_ttl_seconds
+
+    def get_data(self) -> dict:
+        data = self.read()
+
+        return {
+            "temperature": self._temperature(data),
+            "pressure": self._pressure(data),
+            "humidity": self._humidity(data),
+            "brightness": self._brightness(data),
+            "motion": self._motion(data),
+        }
+
     @property
     def temperature(self) -> int:
-        data = self.read()
-        return data[self.TEMP_REG]
+        return self._temperature(self.read())
 
     @property
     def brightness(self) -> int:
-        data = self.read()
-        return data[self.LIGHT_REG_H] << 8 | data[self.LIGHT_REG_L]
+        return self._brightness(self.read())
 
     @property
     def humidity(self) -> int:
-        data = self.read()
-        return data[self.ON_BOARD_HUMIDITY_REG]
+        return self._humidity(self.read())
 
     @property
     def pressure(self) -> int:
-        data = self.read()
-        return round(
-            (
-                data[self.BMP280_PRESSURE_REG_L]
-                | data[self.BMP280_PRESSURE_REG_M] << 8
-                | data[self.BMP280_PRESSURE_REG_H] << 16
-            )
-            / 100
-        )
+        return self._pressure(self.read())
 
     @property
     def onboard_temperature(self) -> int:
@@ -86,15 +173,36 @@ class DockerPiSensorHub(SensorHub):
 
     @property
     def motion(self) -> bool:
-        data = self.read()
+        return self._motion(self.read())
+
+    def _temperature(self, data):
+        return data[self.TEMP_REG]
+
+    def _brightness(self, data):
+        return data[self.LIGHT_REG_H] << 8 | data[self.LIGHT_REG_L]
+
+    def _humidity(self, data):
+        return data[self.ON_BOARD_HUMIDITY_REG]
+
+    def _pressure(self, data):
+        return round(
+            (
+                data[self.BMP280_PRESSURE_REG_L]
+                | data[self.BMP280_PRESSURE_REG_M] << 8
+                | data[self.BMP280_PRESSURE_REG_H] << 16
+            )
+            / 100
+        )
+
+    def _motion(self, data):
         return data[self.HUMAN_DETECT] == 1
 
-    def status(self):
+    def status(self, force=False):
         warnings = []
         errors = []
         status = self.BOARD_STATUS_OK
 
-        data = self.read()  # ensure not stale
+        data = self.read(force=force)
 
         status_func_reg = data[self.STATUS_REG]
         bmp280_func_reg = data[self.BMP280_STATUS]
@@ -141,3 +249,6 @@ class DockerPiSensorHub(SensorHub):
             self.log.error(err)
 
         return status, warnings, errors
+
+    def __del__(self):
+        self.close()
@@ -90,6 +90,19 @@ class MotionSensor(Sensor):
             )
         )
 
+    @property
+    def supports_motion_events(self) -> bool:
+        """Returns whether the sensor calls motion callbacks on edges, so needn't be polled"""
+        return False
+
+    def add_motion_callback(self, callback) -> None:
+        """Registers callback(sensor, motion) to be called when motion starts or stops"""
+        raise NotImplementedError(
+            "Sub-classes of {} should implement function {}".format(
+                self.__class__.__name__, self.add_motion_callback.__name__
+            )
+        )
+
 
 class SensorHub(
     TemperatureSensor, BrightnessSensor, HumiditySensor, PressureSensor, MotionSensor
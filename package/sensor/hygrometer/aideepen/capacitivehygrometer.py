@@ -4,6 +4,8 @@ from ..hygrometer import Hygrometer
 
 class CapacitiveHygrometer(Hygrometer):
     ADC_MAX_VOLTAGE = 3.3
+    ADC_SPI_PORT = 0
+    ADC_SPI_DEVICE = 0
 
     def __init__(
         self,
@@ -20,7 +22,12 @@ class CapacitiveHygrometer(Hygrometer):
         self._min_value = min_value
         self._max_value = max_value
 
-        self._adc = MCP3008(channel=self._adc_channel, max_voltage=self.ADC_MAX_VOLTAGE)
+        self._adc = MCP3008(
+            channel=self._adc_channel,
+            max_voltage=self.ADC_MAX_VOLTAGE,
+            port=self.ADC_SPI_PORT,
+            device=self.ADC_SPI_DEVICE,
+        )
 
         super().__init__(name, dry_value_percentage)
 
@@ -39,6 +46,11 @@ class CapacitiveHygrometer(Hygrometer):
 
         return perc_of_max_in_range
 
+    @property
+    def bus(self):
+        # every channel of the MCP3008 is read over the same SPI device
+        return "spi{}.{}".format(self.ADC_SPI_PORT, self.ADC_SPI_DEVICE)
+
     @property
     def adc_channel(self):
         return self._adc_channel
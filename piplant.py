@@ -1,15 +1,21 @@
 import sys
 import os
 import yaml
-import time
+import signal
+import asyncio
 import argparse
-import schedule
-import threading
 import logging.config
 import util.utils as utils
 from package.package import PackageImporter
+from core.scheduler.scheduler import Scheduler
+from core.job_runner.job_runner import JobRunner
+from core.async_runtime.async_runtime import AsyncRuntime
+from core.sensor_manager.read_cache import SensorReadCache
 from core.sensor_manager.sensor_manager import SensorManager
 from core.display_manager.display_manager import DisplayManager
+from core.database_manager.retention import RetentionPolicy
+from core.database_manager.spool import SampleSpool
+from core.database_manager.ingestion import IngestionQueue
 from core.database_manager.database_manager import DatabaseManager
 from core.schedule_manager.schedule_manager import ScheduleManager
 from core.motion_lights_manager.motion_lights_manager import (
@@ -43,15 +49,23 @@ parser.add_argument(
     default=False,
     help="Flag to enable verbose logging",
 )
-
-
-def threaded(func):
-    run_thread = threading.Thread(target=func)
-    run_thread.start()
+parser.add_argument(
+    "-a",
+    "--async",
+    dest="use_async",
+    action="store_true",
+    default=False,
+    help="Flag to drive the managers from a single asyncio event loop",
+)
 
 
 class PiPlant:
-    def __init__(self, config, packages_config, mock=False, debug=False):
+    # docker stop sends SIGTERM, and python as PID 1 would otherwise just exit
+    STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+    def __init__(
+        self, config, packages_config, mock=False, debug=False, use_async=False
+    ):
         template_path = os.path.join(cwd, "template")
         logging_cfg_path = os.path.join(template_path, "logging.ini")
         if debug:
@@ -61,17 +75,26 @@ class PiPlant:
 
         self.debug = debug
         self.mock = mock
+        self.use_async = use_async
 
         if self.debug:
             self.log.info("In global debug mode")
         if self.mock:
             self.log.info("In global mock mode")
+        if self.use_async:
+            self.log.info("In asyncio runtime mode")
 
         self.database_manager = None
+        self.retention_interval_seconds = None
+        self.ingestion_queue = None
         self.display_manager = None
         self.schedule_manager = None
         self.sensor_manager = None
         self.motion_lights_manager = None
+        self.job_runner = None
+        self.scheduler = Scheduler()
+        # lets the motion and sensor managers share hardware reads
+        self.sensor_read_cache = SensorReadCache()
 
         # dynamically import packages
         self.log.info("Importing packages...")
@@ -141,12 +164,40 @@ class PiPlant:
             db_driver = utils.get_config_prop_by_keys(
                 config, "database_manager", "driver"
             )
-            self.database_manager = DatabaseManager(db_driver)
+            retention_policy = None
+            if "retention" in config["database_manager"]:
+                retention_config = config["database_manager"]["retention"]
+                retention_policy = self.get_retention_policy(retention_config)
+                self.retention_interval_seconds = utils.get_config_prop(
+                    retention_config, "interval", default="1h", dehumanized=True
+                )
+
+            self.database_manager = DatabaseManager(
+                db_driver, retention_policy=retention_policy
+            )
+
+            if "ingestion" in config["database_manager"]:
+                self.ingestion_queue = self.get_ingestion_queue(
+                    config["database_manager"]["ingestion"]
+                )
 
         # sensor manager
         if sensor_manager_enabled:
             sensors = utils.get_config_prop_by_keys(config, "sensor_manager", "sensors")
-            self.sensor_manager = SensorManager(sensors, self.database_manager)
+            max_workers = utils.get_config_prop(
+                config["sensor_manager"], "max_workers", default=4
+            )
+            deadline_seconds = utils.get_config_prop(
+                config["sensor_manager"], "deadline", default="10s", dehumanized=True
+            )
+            self.sensor_manager = SensorManager(
+                sensors,
+                self.database_manager,
+                max_workers=max_workers,
+                deadline_seconds=deadline_seconds,
+                read_cache=self.sensor_read_cache,
+                ingestion_queue=self.ingestion_queue,
+            )
 
         # schedule manager
         if schedule_manager_enabled:
@@ -157,7 +208,16 @@ class PiPlant:
                 config, "schedule_manager", "device_groups", required=True
             )
 
-            self.schedule_manager = ScheduleManager(device_groups, schedules)
+            max_sleep_seconds = utils.get_config_prop(
+                config["schedule_manager"],
+                "query_interval",
+                default="1m",
+                dehumanized=True,
+            )
+
+            self.schedule_manager = ScheduleManager(
+                device_groups, schedules, max_sleep_seconds=max_sleep_seconds
+            )
 
         # motion trigger manager
         if motion_trigger_manager_enabled:
@@ -180,6 +240,12 @@ class PiPlant:
                 required=True,
                 dehumanized=True,
             )
+            debounce_seconds = utils.get_config_prop(
+                config["motion_lights_manager"],
+                "debounce",
+                default="1s",
+                dehumanized=True,
+            )
 
             self.motion_lights_manager = MotionLightsManager(
                 device_groups,
@@ -187,6 +253,8 @@ class PiPlant:
                 on_motion_trigger_config,
                 on_motion_timeout_config,
                 timeout_seconds,
+                debounce_seconds=debounce_seconds,
+                read_cache=self.sensor_read_cache,
             )
 
         # display manager
@@ -217,38 +285,279 @@ class PiPlant:
                 debug=self.debug,
             )
 
+        # job runner
+        # by default the job runner has a worker per job, so a display refresh or
+        # retention pass never holds up the motion lights
+        self.max_workers = utils.get_config_prop(config, "max_workers", required=False)
+        self.job_runner = JobRunner(max_workers=self.max_workers)
+
+        if self.sensor_manager is not None:
+            self.job_runner.add_job("sensor_manager", self.sensor_manager.run)
+
+        if self.schedule_manager is not None:
+            self.job_runner.add_job("schedule_manager", self.run_schedule_manager)
+
+        if self.motion_lights_manager is not None:
+            # a motion edge during a run queues another so the run sees it
+            self.job_runner.add_job(
+                "motion_lights_manager",
+                self.motion_lights_manager.run,
+                policy=JobRunner.POLICY_COALESCE,
+            )
+
+        if self.display_manager is not None:
+            self.job_runner.add_job("display_manager", self.display_manager.run)
+
+        if self.retention_interval_seconds is not None:
+            # a pass that is still pruning makes the next tick redundant
+            self.job_runner.add_job(
+                "database_retention",
+                self.database_manager.prune,
+                policy=JobRunner.POLICY_SKIP,
+            )
+
     def schedule(self):
         if self.sensor_manager is not None:
-            schedule.every().minute.do(threaded, self.sensor_manager.run)
+            self.scheduler.every(
+                60, "sensor_manager", self.job_runner.submit, "sensor_manager"
+            )
 
         if self.schedule_manager is not None:
-            schedule.every().minute.do(threaded, self.schedule_manager.run)
+            # rescheduled after each run to the next schedule boundary
+            self.scheduler.every(
+                self.schedule_manager.max_sleep_seconds,
+                "schedule_manager",
+                self.job_runner.submit,
+                "schedule_manager",
+            )
 
         if self.motion_lights_manager is not None:
-            schedule.every(5).seconds.do(threaded, self.motion_lights_manager.run)
+            self.scheduler.every(
+                5,
+                "motion_lights_manager",
+                self.job_runner.submit,
+                "motion_lights_manager",
+            )
+            # motion edges run the job right away, off the sensor's callback thread
+            self.motion_lights_manager.set_edge_handler(
+                lambda: self.scheduler.trigger("motion_lights_manager")
+            )
 
         if self.display_manager is not None:
-            schedule.every().minute.do(threaded, self.display_manager.run)
+            self.scheduler.every(
+                60, "display_manager", self.job_runner.submit, "display_manager"
+            )
+
+        if self.retention_interval_seconds is not None:
+            self.scheduler.every(
+                self.retention_interval_seconds,
+                "database_retention",
+                self.job_runner.submit,
+                "database_retention",
+            )
+
+        self.scheduler.every(15 * 60, "log_job_stats", self.log_job_stats)
+
+    def get_retention_policy(self, retention_config) -> RetentionPolicy:
+        def get_retention_seconds(key):
+            if key not in retention_config:
+                return None
+
+            return utils.dehumanize(retention_config[key])
+
+        return RetentionPolicy(
+            raw_seconds=get_retention_seconds("raw"),
+            rollup_seconds={
+                5 * 60: get_retention_seconds("rollups_5m"),
+                60 * 60: get_retention_seconds("rollups_hourly"),
+                24 * 60 * 60: get_retention_seconds("rollups_daily"),
+            },
+            batch_size=utils.get_config_prop(
+                retention_config, "batch_size", default=500
+            ),
+            vacuum_pages=utils.get_config_prop(
+                retention_config, "vacuum_pages", default=0
+            ),
+        )
+
+    def get_ingestion_queue(self, ingestion_config) -> IngestionQueue:
+        spool = None
+        if "spool" in ingestion_config:
+            spool = SampleSpool(
+                ingestion_config["spool"],
+                max_bytes=utils.get_config_prop(
+                    ingestion_config, "spool_max_kb", default=4096
+                )
+                * 1024,
+            ).open()
+
+        return IngestionQueue(
+            self.database_manager,
+            batch_size=utils.get_config_prop(
+                ingestion_config, "batch_size", default=500
+            ),
+            max_age_seconds=utils.get_config_prop(
+                ingestion_config, "max_age", default="5s", dehumanized=True
+            ),
+            max_queued=utils.get_config_prop(
+                ingestion_config, "max_queued", default=10000
+            ),
+            retry_seconds=utils.get_config_prop(
+                ingestion_config, "retry", default="5s", dehumanized=True
+            ),
+            spool=spool,
+            max_unjournalled=utils.get_config_prop(
+                ingestion_config, "max_unjournalled", required=False
+            ),
+        )
 
     def run_once(self):
         if self.sensor_manager is not None:
-            threaded(self.sensor_manager.run)
+            self.job_runner.submit("sensor_manager")
 
         if self.schedule_manager is not None:
-            threaded(self.schedule_manager.run)
+            self.job_runner.submit("schedule_manager")
 
         if self.motion_lights_manager is not None:
-            threaded(self.motion_lights_manager.run)
+            self.job_runner.submit("motion_lights_manager")
 
         if self.display_manager is not None:
-            threaded(self.display_manager.run)
+            self.job_runner.submit("display_manager")
+
+    def run_schedule_manager(self):
+        self.schedule_manager.run()
+        self.scheduler.reschedule(
+            "schedule_manager", self.schedule_manager.get_sleep_seconds()
+        )
+
+    def log_job_stats(self):
+        lateness = self.scheduler.get_lateness()
+        for name, stats in self.job_runner.get_stats().items():
+            self.log.debug(
+                "Job {}: {} lateness: {}".format(name, stats, lateness.get(name))
+            )
+
+        self.log_sensor_read_stats()
+        self.log_ingestion_stats()
+        self.log_device_group_stats()
+
+    def log_sensor_read_stats(self):
+        for name, stats in self.sensor_read_cache.stats.items():
+            self.log.debug("Sensor {} reads: {}".format(name, stats))
+
+    def log_ingestion_stats(self):
+        if self.ingestion_queue is not None:
+            self.log.debug("Ingestion: {}".format(self.ingestion_queue.stats))
+
+    def log_device_group_stats(self):
+        # a group may be shared by the schedule and motion lights managers
+        device_groups = dict()
+        for manager in (self.schedule_manager, self.motion_lights_manager):
+            if manager is not None:
+                for group in manager.device_groups:
+                    device_groups[id(group)] = group
+
+        for group in device_groups.values():
+            self.log.debug(
+                "Device group {} retries: {}".format(group.name, group.retry_stats)
+            )
 
     def run(self):
+        if self.use_async:
+            asyncio.run(self.run_async())
+            return
+
+        def stop(signum, frame):
+            self.log.info("{} received, stopping".format(signal.Signals(signum).name))
+            self.scheduler.stop()
+
+        for signum in self.STOP_SIGNALS:
+            signal.signal(signum, stop)
+
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.start()
+
         self.run_once()
         self.schedule()
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        try:
+            self.scheduler.run()
+        finally:
+            self.scheduler.stop()
+            self.job_runner.shutdown(wait=False)
+            self.stop_ingestion()
+
+    def stop_ingestion(self):
+        # writes out whatever the sensor manager queued before shutting down
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.stop(timeout=30)
+
+    async def run_async(self):
+        runtime = AsyncRuntime(
+            max_workers=self.max_workers if self.max_workers is not None else 4
+        )
+
+        if self.sensor_manager is not None:
+            runtime.every(60, "sensor_manager", self.sensor_manager.run_async)
+
+        if self.schedule_manager is not None:
+            runtime.every(
+                self.schedule_manager.max_sleep_seconds,
+                "schedule_manager",
+                self.schedule_manager.run_async,
+                next_interval=self.schedule_manager.get_sleep_seconds,
+            )
+
+        if self.motion_lights_manager is not None:
+            runtime.every(
+                5, "motion_lights_manager", self.motion_lights_manager.run_async
+            )
+            # motion edges run the job right away, off the sensor's callback thread
+            self.motion_lights_manager.set_edge_handler(
+                lambda: runtime.trigger("motion_lights_manager")
+            )
+
+        if self.display_manager is not None:
+            runtime.every(60, "display_manager", self.display_manager.run_async)
+
+        if self.retention_interval_seconds is not None:
+
+            async def prune_database():
+                await utils.run_blocking(self.database_manager.prune)
+
+            runtime.every(
+                self.retention_interval_seconds, "database_retention", prune_database
+            )
+
+        async def log_runtime_stats():
+            for name, stats in runtime.get_stats().items():
+                self.log.debug("Job {}: {}".format(name, stats))
+
+            self.log_sensor_read_stats()
+            self.log_ingestion_stats()
+            self.log_device_group_stats()
+
+        runtime.every(15 * 60, "log_job_stats", log_runtime_stats)
+
+        if self.ingestion_queue is not None:
+            self.ingestion_queue.start()
+
+        runtime_task = asyncio.create_task(runtime.run())
+
+        def stop(signum):
+            self.log.info("{} received, stopping".format(signal.Signals(signum).name))
+            runtime_task.cancel()
+
+        loop = asyncio.get_running_loop()
+        for signum in self.STOP_SIGNALS:
+            loop.add_signal_handler(signum, stop, signum)
+
+        try:
+            await runtime_task
+        except asyncio.CancelledError:
+            if not runtime_task.cancelled():
+                raise
+        finally:
+            self.stop_ingestion()
 
 
 if __name__ == "__main__":
@@ -272,5 +581,11 @@ if __name__ == "__main__":
     config = yaml.safe_load(args.config)
     packages_config = yaml.safe_load(args.packages)
 
-    piplant = PiPlant(config, packages_config, mock=args.mock, debug=args.debug)
+    piplant = PiPlant(
+        config,
+        packages_config,
+        mock=args.mock,
+        debug=args.debug,
+        use_async=args.use_async,
+    )
     piplant.run()
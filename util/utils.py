@@ -1,6 +1,8 @@
 import re
+import asyncio
 import datetime
 import operator
+import functools
 from functools import reduce
 from reprlib import Repr
 import reprlib
@@ -209,6 +211,12 @@ def get_config_prop(config, prop, default=None, required=True, dehumanized=False
     return val
 
 
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking call on the event loop's default executor and awaits the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
 def avg(values: list[int]) -> int:
     return round(sum(values) / len(values))
 